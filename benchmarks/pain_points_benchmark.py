@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк find_pain_points: построчный iterrows против векторизованного пути
+
+Запуск из корня репозитория:
+    python benchmarks/pain_points_benchmark.py
+    python benchmarks/pain_points_benchmark.py --sizes 10000,100000 --legacy-max 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.reddit_scraper import RedditSaaSValidator  # noqa: E402
+
+
+def legacy_find_pain_points(posts_df, pain_keywords):
+    """
+    Прежняя реализация: iterrows + проверка каждого ключевого слова
+    """
+    pain_posts = []
+
+    for _, post in posts_df.iterrows():
+        combined_text = f"{post['title']} {post['text']}".lower()
+
+        matched_keywords = []
+        for keyword in pain_keywords:
+            if keyword in combined_text:
+                matched_keywords.append(keyword)
+
+        if matched_keywords:
+            pain_posts.append({
+                'post_id': post['id'],
+                'subreddit': post['subreddit'],
+                'title': post['title'],
+                'text': post['text'][:200] + '...' if len(post['text']) > 200 else post['text'],
+                'keywords': ', '.join(matched_keywords),
+                'engagement': post['engagement'],
+                'score': post['score'],
+                'num_comments': post['num_comments'],
+                'url': post['url']
+            })
+
+    return pd.DataFrame(pain_posts)
+
+
+def make_posts(rows, seed=42):
+    """
+    Синтетические посты: ~20% содержат маркеры проблем
+    """
+    rng = random.Random(seed)
+    vocabulary = [
+        ''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(2, 9))) for _ in range(5000)
+    ]
+    # Слова, которые меняют длину при lower() ('İ' -> 'i̇'), и прочий не-ASCII текст
+    vocabulary += ['İstanbul', 'İŞ', 'straße', 'café', 'ΣΟΦΙΑ', 'приложение', '日本語'] * 20
+    markers = RedditSaaSValidator.PAIN_KEYWORDS
+
+    def sentence(words):
+        text = ' '.join(rng.choices(vocabulary, k=words))
+        if rng.random() < 0.2:
+            text += ' ' + rng.choice(markers)
+        return text
+
+    titles = [sentence(10) for _ in range(rows)]
+    texts = [sentence(rng.randint(0, 80)) for _ in range(rows)]
+    numbers = np.random.default_rng(seed)
+    score = numbers.integers(0, 500, rows).astype('int32')
+    num_comments = numbers.integers(0, 200, rows).astype('int32')
+
+    return pd.DataFrame({
+        'id': [f'p{i}' for i in range(rows)],
+        'subreddit': pd.Categorical(numbers.choice(['SaaS', 'startups', 'marketing'], rows)),
+        'title': titles,
+        'text': texts,
+        'score': score,
+        'num_comments': num_comments,
+        'url': [f'https://reddit.com/r/SaaS/comments/p{i}' for i in range(rows)],
+        'engagement': score + num_comments,
+    })
+
+
+def measure(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк find_pain_points')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Размеры выборок через запятую')
+    parser.add_argument('--legacy-max', type=int, default=None,
+                        help='Не запускать прежнюю реализацию на выборках больше этого размера')
+    args = parser.parse_args()
+
+    validator = object.__new__(RedditSaaSValidator)
+    keywords = RedditSaaSValidator.PAIN_KEYWORDS
+
+    print(f"{'rows':>10} {'iterrows, s':>12} {'vectorized, s':>14} {'speedup':>8} {'pain posts':>11}")
+
+    for rows in (int(size) for size in args.sizes.split(',')):
+        posts_df = make_posts(rows)
+
+        vectorized, vectorized_time = measure(validator.find_pain_points, posts_df)
+
+        if args.legacy_max is not None and rows > args.legacy_max:
+            print(f"{rows:>10} {'-':>12} {vectorized_time:>14.2f} {'-':>8} {len(vectorized):>11}")
+            continue
+
+        legacy, legacy_time = measure(legacy_find_pain_points, posts_df, keywords)
+
+        # Векторизованный путь должен давать тот же результат
+        assert legacy['post_id'].tolist() == vectorized['post_id'].tolist()
+        assert legacy['keywords'].tolist() == vectorized['keywords'].tolist()
+        assert legacy['text'].tolist() == vectorized['text'].tolist()
+
+        print(f"{rows:>10} {legacy_time:>12.2f} {vectorized_time:>14.2f} "
+              f"{legacy_time / vectorized_time:>7.1f}x {len(vectorized):>11}")
+
+
+if __name__ == '__main__':
+    main()
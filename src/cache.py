@@ -0,0 +1,319 @@
+"""
+Персистентный TTL кэш для ответов API
+
+SQLiteCache - локальный файл (CLI, разработка)
+RedisCache - общий кэш для backend и Celery workers
+
+Оба backend поддерживают TTL на запись, LRU вытеснение при превышении
+max_entries и персистентные счетчики hits/misses для оценки размера кэша.
+Backend выбирается переменной окружения CACHE_BACKEND (sqlite/redis/none).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class SQLiteCache:
+    """
+    TTL + LRU кэш в SQLite файле
+    """
+
+    def __init__(self, path, namespace, max_entries=50000):
+        """
+        Args:
+            path: путь к файлу базы
+            namespace: пространство ключей (например, 'reddit_search')
+            max_entries: максимум записей в namespace, старые по доступу вытесняются
+        """
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, accessed_at);
+            CREATE TABLE IF NOT EXISTS cache_stats (
+                namespace TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        Получить значение или None, если записи нет или TTL истек
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """
+        Получить несколько значений одним запросом
+
+        Returns:
+            dict {key: value} только для найденных записей
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        now = time.time()
+        found = {}
+
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key, value, expires_at FROM cache_entries '
+                    f'WHERE namespace = ? AND key IN ({placeholders})',
+                    [self.namespace, *chunk]
+                ).fetchall()
+
+                for key, value, expires_at in rows:
+                    if expires_at > now:
+                        found[key] = json.loads(value)
+
+            if found:
+                self._conn.executemany(
+                    'UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                    [(now, self.namespace, key) for key in found]
+                )
+
+            self._conn.execute(
+                'INSERT INTO cache_stats (namespace, hits, misses) VALUES (?, ?, ?) '
+                'ON CONFLICT(namespace) DO UPDATE SET hits = hits + excluded.hits, '
+                'misses = misses + excluded.misses',
+                (self.namespace, len(found), len(keys) - len(found))
+            )
+            self._conn.commit()
+
+        return found
+
+    def set(self, key, value, ttl):
+        """
+        Сохранить JSON-сериализуемое значение на ttl секунд
+        """
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items, ttl):
+        """
+        Сохранить несколько значений с одинаковым TTL
+        """
+        if not items:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [
+                    (self.namespace, key, json.dumps(value, default=str), now + ttl, now)
+                    for key, value in items.items()
+                ]
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute(
+            'DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?',
+            (self.namespace, now)
+        )
+
+        (count,) = self._conn.execute(
+            'SELECT COUNT(*) FROM cache_entries WHERE namespace = ?', (self.namespace,)
+        ).fetchone()
+
+        if count > self.max_entries:
+            # LRU: удаляем записи, к которым дольше всего не обращались
+            self._conn.execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND key IN ('
+                '  SELECT key FROM cache_entries WHERE namespace = ? '
+                '  ORDER BY accessed_at LIMIT ?)',
+                (self.namespace, self.namespace, count - self.max_entries)
+            )
+
+    def stats(self):
+        """
+        Счетчики кэша за всё время: hits, misses, hit_rate, entries
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT hits, misses FROM cache_stats WHERE namespace = ?', (self.namespace,)
+            ).fetchone()
+            (entries,) = self._conn.execute(
+                'SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires_at > ?',
+                (self.namespace, time.time())
+            ).fetchone()
+
+        hits, misses = row if row else (0, 0)
+        total = hits + misses
+
+        return {
+            'backend': 'sqlite',
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0,
+            'entries': entries
+        }
+
+
+class RedisCache:
+    """
+    TTL + LRU кэш в Redis
+
+    TTL обеспечивает сам Redis, порядок доступа хранится в sorted set, время
+    истечения каждой записи - во втором sorted set (по нему чистится первый)
+    """
+
+    def __init__(self, url, namespace, max_entries=50000):
+        if redis is None:
+            raise ImportError("Для RedisCache установите пакет redis: pip install redis")
+
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._lru_key = f'cache:{namespace}:lru'
+        self._expires_key = f'cache:{namespace}:expires'
+        self._stats_key = f'cache:{namespace}:stats'
+
+    def _key(self, key):
+        return f'cache:{self.namespace}:{key}'
+
+    def get(self, key):
+        """
+        Получить значение или None, если записи нет или TTL истек
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """
+        Получить несколько значений одним MGET
+
+        Returns:
+            dict {key: value} только для найденных записей
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        values = self.client.mget([self._key(key) for key in keys])
+        found = {key: json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+        now = time.time()
+        pipe = self.client.pipeline()
+        if found:
+            pipe.zadd(self._lru_key, {key: now for key in found})
+        pipe.hincrby(self._stats_key, 'hits', len(found))
+        pipe.hincrby(self._stats_key, 'misses', len(keys) - len(found))
+        pipe.execute()
+
+        return found
+
+    def set(self, key, value, ttl):
+        """
+        Сохранить JSON-сериализуемое значение на ttl секунд
+        """
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items, ttl):
+        """
+        Сохранить несколько значений с одинаковым TTL
+        """
+        if not items:
+            return
+
+        now = time.time()
+        ttl = int(max(ttl, 1))
+        pipe = self.client.pipeline()
+        for key, value in items.items():
+            pipe.set(self._key(key), json.dumps(value, default=str), ex=ttl)
+        pipe.zadd(self._lru_key, {key: now for key in items})
+        pipe.zadd(self._expires_key, {key: now + ttl for key in items})
+        pipe.zrangebyscore(self._expires_key, '-inf', now)
+        expired = pipe.execute()[-1]
+
+        # Записи с истекшим TTL уже удалены самим Redis - убираем их из LRU порядка
+        pipe = self.client.pipeline()
+        if expired:
+            pipe.zrem(self._lru_key, *expired)
+            pipe.zrem(self._expires_key, *expired)
+        pipe.zcard(self._lru_key)
+        count = pipe.execute()[-1]
+
+        if count > self.max_entries:
+            # LRU: удаляем записи, к которым дольше всего не обращались
+            stale = self.client.zrange(self._lru_key, 0, count - self.max_entries - 1)
+            if stale:
+                stale = [key.decode() if isinstance(key, bytes) else key for key in stale]
+                pipe = self.client.pipeline()
+                pipe.delete(*[self._key(key) for key in stale])
+                pipe.zrem(self._lru_key, *stale)
+                pipe.zrem(self._expires_key, *stale)
+                pipe.execute()
+
+    def stats(self):
+        """
+        Счетчики кэша за всё время: hits, misses, hit_rate, entries
+        """
+        raw = self.client.hgetall(self._stats_key)
+        hits = int(raw.get(b'hits', 0))
+        misses = int(raw.get(b'misses', 0))
+        total = hits + misses
+
+        return {
+            'backend': 'redis',
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0,
+            'entries': self.client.zcard(self._lru_key)
+        }
+
+
+def create_cache(namespace, max_entries=50000):
+    """
+    Создать кэш по переменным окружения
+
+    CACHE_BACKEND: sqlite (по умолчанию), redis или none
+    CACHE_PATH: файл SQLite (по умолчанию .cache/saas_validator.sqlite)
+    CACHE_REDIS_URL / REDIS_URL: адрес Redis
+
+    Returns:
+        SQLiteCache, RedisCache или None, если кэш отключен
+    """
+    backend_name = os.getenv('CACHE_BACKEND', 'sqlite').lower()
+
+    if backend_name == 'none':
+        return None
+
+    if backend_name == 'redis':
+        url = os.getenv('CACHE_REDIS_URL') or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        return RedisCache(url, namespace, max_entries=max_entries)
+
+    path = os.getenv('CACHE_PATH', os.path.join('.cache', 'saas_validator.sqlite'))
+    return SQLiteCache(path, namespace, max_entries=max_entries)
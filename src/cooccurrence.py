@@ -0,0 +1,136 @@
+"""
+Совместная встречаемость терминов в постах
+
+Из разреженной матрицы посты × термины X (scipy CSR) одним произведением
+X.T @ X получаются числа постов для всех пар терминов сразу, на диагонали -
+документная частота каждого термина. Lift пары считается векторно по
+ненулевым элементам: lift = n(a, b) * N / (n(a) * n(b)); lift > 1 - термины
+встречаются вместе чаще, чем при независимости.
+
+Матрица строится из матриц совпадений KeywordMatcher.hit_matrix - тех же, по
+которым find_pain_points отмечает болевые посты (подстрока без учета
+регистра), поэтому термины группы 'pain' совпадают с маркерами отмеченных
+постов. Для пословного совпадения есть from_index по InvertedIndex корпуса.
+"""
+
+import numpy as np
+from scipy import sparse
+
+from .text_matching import KeywordMatcher
+
+
+class CooccurrenceMatrix:
+    """
+    Co-occurrence и lift для групп терминов (pain, product, competitor, ...)
+
+    Пример:
+        matrix = CooccurrenceMatrix.from_texts(texts, {'pain': PAIN_KEYWORDS, 'product': keywords})
+        matrix.top_pairs('pain', 'product')
+    """
+
+    def __init__(self, matrix, groups):
+        """
+        Args:
+            matrix: scipy.sparse матрица посты × термины (bool или 0/1)
+            groups: dict {группа: список терминов}; колонки matrix идут в порядке групп
+        """
+        self.groups = {name: list(terms) for name, terms in groups.items()}
+        self.terms = [term for terms in self.groups.values() for term in terms]
+        self.n_docs = matrix.shape[0]
+
+        bounds = np.cumsum([0] + [len(terms) for terms in self.groups.values()])
+        self._columns = {
+            name: np.arange(start, stop) for name, start, stop in zip(self.groups, bounds[:-1], bounds[1:])
+        }
+
+        matrix = sparse.csr_matrix(matrix, dtype=np.int32)
+        self.counts = (matrix.T @ matrix).tocsr()
+        self.document_frequency = self.counts.diagonal()
+
+    @classmethod
+    def from_texts(cls, texts, groups):
+        """
+        Построить по матрицам совпадений KeywordMatcher (семантика find_pain_points)
+
+        Args:
+            texts: pandas Series текстов
+            groups: dict {группа: список терминов}
+        """
+        matchers = {
+            name: KeywordMatcher.for_keywords(terms) for name, terms in groups.items() if terms
+        }
+        matrix = sparse.hstack([matcher.hit_matrix(texts) for matcher in matchers.values()], format='csr')
+        # Колонки hit_matrix - ключевые слова matcher'а (в нижнем регистре, без повторов)
+        return cls(matrix, {name: matcher.keywords for name, matcher in matchers.items()})
+
+    @classmethod
+    def from_index(cls, index, groups):
+        """
+        Построить по InvertedIndex корпуса
+
+        Args:
+            index: InvertedIndex постов
+            groups: dict {группа: список терминов (слова или фразы)}
+        """
+        groups = {name: list(terms) for name, terms in groups.items() if terms}
+        terms = [term for terms in groups.values() for term in terms]
+        return cls(index.term_matrix(terms), groups)
+
+    def lift(self):
+        """
+        Разреженная матрица lift той же структуры, что counts
+        """
+        lift = self.counts.tocoo()
+        frequency = self.document_frequency.astype(float)
+        values = lift.data * self.n_docs / (frequency[lift.row] * frequency[lift.col])
+        return sparse.csr_matrix((values, (lift.row, lift.col)), shape=lift.shape)
+
+    def top_pairs(self, group_a, group_b, min_count=2, limit=20):
+        """
+        Самые связанные пары терминов из двух групп
+
+        Args:
+            group_a, group_b: названия групп
+            min_count: минимальное число постов с парой
+            limit: сколько пар вернуть
+
+        Returns:
+            список dict {'term_a', 'term_b', 'count', 'lift'}, по убыванию lift, затем count
+        """
+        if group_a not in self._columns or group_b not in self._columns:
+            return []
+
+        rows, columns = self._columns[group_a], self._columns[group_b]
+        block = self.counts[rows][:, columns].tocoo()
+
+        terms_a = np.array(self.groups[group_a], dtype=object)[block.row]
+        terms_b = np.array(self.groups[group_b], dtype=object)[block.col]
+        frequency = self.document_frequency.astype(float)
+        lift = block.data * self.n_docs / (frequency[rows[block.row]] * frequency[columns[block.col]])
+
+        # Один и тот же термин может входить в обе группы - такая "пара" ничего не говорит
+        keep = (block.data >= min_count) & (terms_a != terms_b)
+        order = np.lexsort((-block.data[keep], -lift[keep]))[:limit]
+
+        return [
+            {'term_a': term_a, 'term_b': term_b, 'count': int(count), 'lift': round(float(value), 2)}
+            for term_a, term_b, count, value in zip(
+                terms_a[keep][order], terms_b[keep][order], block.data[keep][order], lift[keep][order]
+            )
+        ]
+
+    def report(self, pairs, min_count=2, limit=20):
+        """
+        Топ пар для нескольких сочетаний групп
+
+        Args:
+            pairs: список (group_a, group_b), например [('pain', 'product'), ('pain', 'competitor')]
+
+        Returns:
+            dict {'group_a__group_b': top_pairs(...)} только для групп, которые есть в матрице
+        """
+        return {
+            f'{group_a}__{group_b}': self.top_pairs(group_a, group_b, min_count, limit)
+            for group_a, group_b in pairs
+            if group_a in self._columns and group_b in self._columns
+        }
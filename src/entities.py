@@ -0,0 +1,119 @@
+"""
+Извлечение сущностей из текстов одним проходом
+
+Хештеги, упоминания, ссылки (и их домены) и кэштеги находятся одним
+регулярным выражением с именованными группами - один проход по каждому
+тексту вместо отдельного re.findall на каждый тип. Совпадения всей колонки
+собираются в один DataFrame, дальше подсчет и нормализация векторные.
+Результат - Counter по каждому типу и колонки со списками сущностей каждого
+текста.
+
+Ссылка поглощает свой текст целиком, поэтому якорь в URL (".../page#pricing")
+не считается хештегом. Завершающая пунктуация (markdown "[x](https://x.so)",
+точка или запятая после ссылки) в ссылку и домен не входит.
+"""
+
+import re
+from collections import Counter, namedtuple
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+_ENTITY_RE = re.compile(
+    r'(?P<url>https?://(?:www\.)?(?P<domain>[\w-]+(?:\.[\w-]+)*)\S*?)(?=[)\]>,.;:!?\'"]*(?:\s|$))'
+    r'|#(?P<hashtag>\w+)'
+    r'|@(?P<mention>\w+)'
+    r'|\$(?P<cashtag>[A-Za-z][A-Za-z0-9]{0,5})\b'
+)
+
+# Колонка результата -> группа регулярного выражения
+ENTITY_TYPES = {
+    'hashtags': 'hashtag',
+    'mentions': 'mention',
+    'urls': 'url',
+    'domains': 'domain',
+    'cashtags': 'cashtag',
+}
+
+Entities = namedtuple('Entities', ['counts', 'frame'])
+
+
+def _normalize(values, entity_type):
+    """
+    Хештеги, упоминания и домены сравниваются без учета регистра, кэштеги - в верхнем
+    """
+    if entity_type == 'urls':
+        return values
+    if entity_type == 'cashtags':
+        return values.str.upper()
+    return values.str.lower()
+
+
+def extract_entities(texts, types=None, with_columns=True):
+    """
+    Найти сущности во всех текстах
+
+    Args:
+        texts: pandas Series или итерируемое строк (None/NaN - пустой текст)
+        types: какие типы вернуть (по умолчанию все из ENTITY_TYPES)
+        with_columns: собирать ли списки сущностей каждого текста (без них - только Counter)
+
+    Returns:
+        Entities(counts - dict {тип: Counter},
+                 frame - DataFrame со списками сущностей каждого текста, индекс как у texts;
+                         None при with_columns=False)
+    """
+    if not isinstance(texts, pd.Series):
+        texts = pd.Series(list(texts), dtype=object)
+
+    types = list(types or ENTITY_TYPES)
+    groups = list(_ENTITY_RE.groupindex)
+
+    # Один findall на текст находит все типы сразу: кортеж групп на совпадение
+    found = [_ENTITY_RE.findall(text) if isinstance(text, str) else [] for text in texts]
+    per_text = np.fromiter(map(len, found), dtype=np.int64, count=len(found))
+    matches = pd.DataFrame(list(chain.from_iterable(found)), columns=groups)
+    rows = np.repeat(np.arange(len(found)), per_text)
+
+    counts = {}
+    frame = pd.DataFrame(index=texts.index) if with_columns else None
+
+    for entity_type in types:
+        column = matches[ENTITY_TYPES[entity_type]]
+        is_match = (column != '').to_numpy()
+        values = _normalize(column[is_match], entity_type)
+
+        counts[entity_type] = Counter(values.value_counts().to_dict())
+        if not with_columns:
+            continue
+
+        # Совпадения идут в порядке текстов - режем массив значений по числу совпадений в тексте
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(rows[is_match], minlength=len(found))))).tolist()
+        values = values.tolist()
+        frame[entity_type] = [values[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    return Entities(counts, frame)
+
+
+def add_entities(df, text_columns=('text',), types=None):
+    """
+    Добавить к DataFrame колонки со списками сущностей
+
+    Args:
+        df: DataFrame постов или твитов
+        text_columns: колонки, которые склеиваются в анализируемый текст
+        types: какие типы извлекать (по умолчанию все)
+
+    Returns:
+        dict {тип: Counter} по всему DataFrame
+    """
+    texts = df[text_columns[0]].fillna('').astype(str)
+    for column in text_columns[1:]:
+        texts = texts + ' ' + df[column].fillna('').astype(str)
+
+    entities = extract_entities(texts, types)
+    for column in entities.frame.columns:
+        df[column] = entities.frame[column].to_numpy()
+
+    return entities.counts
@@ -0,0 +1,217 @@
+"""
+Позиционный инвертированный индекс по корпусу текстов
+
+Индекс строится один раз на корпус: для каждого токена хранится posting list
+пар (номер документа, позиция токена) в компактных numpy массивах. После
+этого любой термин - одно слово или фраза вроде "waste time" - вычисляется
+пересечением posting lists, без повторного сканирования текстов.
+
+Совпадение пословное: 'need' находит "I need", но не "needed". Для маркеров,
+которые должны совпадать как в KeywordMatcher (подстрока), есть режим
+substring: под слово термина подходят все токены словаря, содержащие его.
+"""
+
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+class InvertedIndex:
+    """
+    Позиционный инвертированный индекс
+
+    Пример:
+        index = InvertedIndex(posts_df['title'] + ' ' + posts_df['text'])
+        index.docs('waste time')                      # номера документов с фразой
+        index.lexicon_counts({'pain': ['problem', 'waste time']})
+    """
+
+    def __init__(self, texts):
+        """
+        Args:
+            texts: итерируемое текстов (None/NaN считаются пустыми)
+        """
+        token_lists = [
+            _TOKEN_RE.findall(text.lower()) if isinstance(text, str) else []
+            for text in texts
+        ]
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+        total = int(lengths.sum())
+
+        # Словарь токенов строится хэшированием в pandas, а не Python dict на каждый токен
+        tokens = np.empty(total, dtype=object)
+        tokens[:] = list(chain.from_iterable(token_lists))
+        token_ids, uniques = pd.factorize(tokens)
+        token_ids = token_ids.astype(np.int32)
+
+        self.n_docs = len(token_lists)
+        self.vocabulary = {token: token_id for token_id, token in enumerate(uniques)}
+
+        doc_ids = np.repeat(np.arange(self.n_docs, dtype=np.int32), lengths)
+        positions = (np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)).astype(np.int32)
+
+        # Стабильная сортировка сохраняет порядок (документ, позиция) внутри токена
+        order = np.argsort(token_ids, kind='stable')
+
+        self._doc_ids = doc_ids[order]
+        self._positions = positions[order]
+        self._offsets = np.concatenate((
+            [0], np.cumsum(np.bincount(token_ids, minlength=len(uniques)))
+        )).astype(np.int64)
+
+    def __len__(self):
+        return self.n_docs
+
+    def _postings(self, token):
+        token_id = self.vocabulary.get(token)
+        if token_id is None:
+            return None
+
+        start, end = self._offsets[token_id], self._offsets[token_id + 1]
+        return self._doc_ids[start:end], self._positions[start:end]
+
+    def _keys(self, tokens, shift=0):
+        """
+        Отсортированные ключи (документ << 32) + позиция - shift для вхождений любого из tokens
+        """
+        parts = []
+        for token in tokens:
+            postings = self._postings(token)
+            if postings is not None:
+                parts.append((postings[0].astype(np.int64) << 32) + (postings[1] - shift))
+
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+
+        # Posting list одного токена уже отсортирован по (документ, позиция)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def _substring_tokens(self, tokens):
+        """
+        Токены словаря для каждого слова термина при совпадении подстрокой:
+        одно слово - любой токен, содержащий его; у фразы первое слово - конец
+        токена, последнее - начало, средние - целиком
+        """
+        if len(tokens) == 1:
+            return [[token for token in self.vocabulary if tokens[0] in token]]
+
+        return (
+            [[token for token in self.vocabulary if token.endswith(tokens[0])]]
+            + [[token] for token in tokens[1:-1]]
+            + [[token for token in self.vocabulary if token.startswith(tokens[-1])]]
+        )
+
+    def occurrences(self, term, substring=False):
+        """
+        Все вхождения термина с позициями
+
+        Многословный термин ищется как фраза: токены подряд в указанном порядке
+
+        Args:
+            term: слово или фраза
+            substring: совпадение как `term in text` (KeywordMatcher): 'need' находит "needed"
+
+        Returns:
+            (номера документов, позиции начала) - numpy int32 массивы,
+            отсортированные по (документ, позиция)
+        """
+        empty = np.empty(0, dtype=np.int32)
+        tokens = _TOKEN_RE.findall(term.lower())
+        if not tokens:
+            return empty, empty
+
+        if not substring and len(tokens) == 1:
+            postings = self._postings(tokens[0])
+            return postings if postings is not None else (empty, empty)
+
+        options = self._substring_tokens(tokens) if substring else [[token] for token in tokens]
+
+        # Ключ (документ, позиция начала фразы) одним int64
+        keys = None
+        for shift, candidates in enumerate(options):
+            next_keys = self._keys(candidates, shift)
+            keys = next_keys if keys is None else np.intersect1d(keys, next_keys, assume_unique=True)
+
+            if len(keys) == 0:
+                return empty, empty
+
+        return (keys >> 32).astype(np.int32), (keys & 0xFFFFFFFF).astype(np.int32)
+
+    def docs(self, term):
+        """
+        Номера документов, содержащих термин (слово или фразу)
+
+        Returns:
+            отсортированный numpy массив номеров документов
+        """
+        return np.unique(self.occurrences(term)[0])
+
+    def docs_any(self, terms):
+        """
+        Документы, содержащие хотя бы один из терминов
+        """
+        found = [self.docs(term) for term in terms]
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int32)
+
+    def docs_all(self, terms):
+        """
+        Документы, содержащие все термины
+        """
+        result = None
+        for term in terms:
+            found = self.docs(term)
+            result = found if result is None else np.intersect1d(result, found, assume_unique=True)
+            if len(result) == 0:
+                break
+
+        return result if result is not None else np.empty(0, dtype=np.int32)
+
+    def count(self, term):
+        """
+        Количество документов с термином
+        """
+        return len(self.docs(term))
+
+    def term_matrix(self, terms):
+        """
+        Разреженная матрица документы × термины
+
+        Returns:
+            scipy.sparse.csr_matrix bool формы (n_docs, len(terms)), колонки в порядке terms
+        """
+        found = [self.docs(term) for term in terms]
+        rows = np.concatenate(found) if found else np.empty(0, dtype=np.int32)
+        columns = np.repeat(np.arange(len(terms), dtype=np.int32), [len(docs) for docs in found])
+
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=bool), (rows, columns)),
+            shape=(self.n_docs, len(terms))
+        )
+
+    def lexicon_counts(self, lexicons):
+        """
+        Сколько документов затрагивает каждый лексикон и каждый его термин
+
+        Args:
+            lexicons: dict {название: список терминов}
+
+        Returns:
+            dict {название: {'documents': int, 'terms': {термин: int}}}
+        """
+        counts = {}
+
+        for name, terms in lexicons.items():
+            found = {term: self.docs(term) for term in terms}
+            matched = [docs for docs in found.values() if len(docs)]
+
+            counts[name] = {
+                'documents': len(np.unique(np.concatenate(matched))) if matched else 0,
+                'terms': {term: len(docs) for term, docs in found.items() if len(docs)}
+            }
+
+        return counts
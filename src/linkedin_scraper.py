@@ -10,7 +10,27 @@ from datetime import datetime, timedelta
 import json
 import re
 from collections import Counter
-import time
+
+from .post_store import LINKEDIN_UPDATE_SCHEMA, PostStore
+from .rate_limiter import create_rate_limiter
+
+
+class RateLimitedLinkedin(Linkedin):
+    """
+    Linkedin клиент, у которого случайные задержки evade() заменены общим RateLimiter
+    
+    LinkedIn не отдает заголовков квоты, поэтому limiter работает как равномерный token bucket
+    """
+    
+    def __init__(self, *args, rate_limiter=None, **kwargs):
+        self.rate_limiter = rate_limiter or create_rate_limiter('linkedin', capacity=1, period=3)
+        super().__init__(*args, **kwargs)
+    
+    def _fetch(self, uri, evade=None, **kwargs):
+        return super()._fetch(uri, evade=self.rate_limiter.acquire, **kwargs)
+    
+    def _post(self, uri, evade=None, **kwargs):
+        return super()._post(uri, evade=self.rate_limiter.acquire, **kwargs)
 
 
 class LinkedInSaaSValidator:
@@ -26,11 +46,11 @@ class LinkedInSaaSValidator:
             
         Рекомендации:
         - Используйте отдельный тестовый аккаунт
-        - Добавляйте задержки между запросами
+        - Запросы распределяются общим rate limiter (см. rate_limiter.py)
         - Не делайте слишком много запросов за раз
         """
         try:
-            self.api = Linkedin(email, password)
+            self.api = RateLimitedLinkedin(email, password)
             print("✅ LinkedIn API подключен")
         except Exception as e:
             print(f"❌ Ошибка подключения к LinkedIn: {e}")
@@ -63,8 +83,6 @@ class LinkedInSaaSValidator:
                 
                 # Обработка результатов (может потребоваться адаптация)
                 # LinkedIn API возвращает разные типы объектов
-                
-                time.sleep(2)  # Rate limiting
             
             print(f"✅ Найдено {len(posts_data)} постов")
             
@@ -123,31 +141,31 @@ class LinkedInSaaSValidator:
         """
         print(f"Получение постов компании (URN: {company_urn})")
         
-        updates_data = []
+        store = PostStore(LINKEDIN_UPDATE_SCHEMA)
         
         try:
             updates = self.api.get_company_updates(company_urn, max_results=limit)
             
             for update in updates:
                 # Парсинг данных поста
-                update_info = {
-                    'urn': update.get('urn'),
-                    'text': update.get('commentary', {}).get('text', ''),
-                    'created_at': datetime.fromtimestamp(update.get('created', {}).get('time', 0) / 1000),
-                    'likes': update.get('socialDetail', {}).get('totalSocialActivityCounts', {}).get('numLikes', 0),
-                    'comments': update.get('socialDetail', {}).get('totalSocialActivityCounts', {}).get('numComments', 0),
-                    'shares': update.get('socialDetail', {}).get('totalSocialActivityCounts', {}).get('numShares', 0),
-                }
+                social_counts = update.get('socialDetail', {}).get('totalSocialActivityCounts', {})
                 
-                updates_data.append(update_info)
+                store.append((
+                    update.get('urn'),
+                    update.get('commentary', {}).get('text', ''),
+                    update.get('created', {}).get('time', 0),
+                    social_counts.get('numLikes', 0),
+                    social_counts.get('numComments', 0),
+                    social_counts.get('numShares', 0),
+                ))
             
-            print(f"✅ Получено {len(updates_data)} постов")
+            print(f"✅ Получено {len(store)} постов")
             
         except Exception as e:
             print(f"❌ Ошибка: {e}")
             return pd.DataFrame()
         
-        return pd.DataFrame(updates_data)
+        return store.to_frame()
     
     def search_people(self, keywords, industry=None, limit=50):
         """
@@ -295,9 +313,6 @@ class LinkedInSaaSValidator:
                     print(f"  ⚠️ Не удалось получить посты: {e}")
                 
                 competitors_data.append(competitor_data)
-                
-                # Rate limiting
-                time.sleep(3)
         
         # Сохранение результатов
         results = {
@@ -342,9 +357,6 @@ class LinkedInSaaSValidator:
             if not people_df.empty:
                 people_df['search_job_title'] = job_title
                 all_people.append(people_df)
-            
-            # Rate limiting
-            time.sleep(2)
         
         if not all_people:
             print("❌ Целевая аудитория не найдена")
@@ -65,7 +65,7 @@ class MultiPlatformValidator:
     
     def validate_idea(self, idea_name, keywords, subreddits=None, 
                      target_job_titles=None, competitor_names=None,
-                     output_dir='validation_results'):
+                     output_dir='validation_results', twitter_top_keywords=3):
         """
         Полная валидация идеи через все доступные платформы
         
@@ -76,6 +76,8 @@ class MultiPlatformValidator:
             target_job_titles: список целевых должностей для LinkedIn
             competitor_names: список конкурентов
             output_dir: директория для сохранения результатов
+            twitter_top_keywords: для скольких ключевых слов с наибольшим объемом
+                скачивать твиты целиком (объем остальных - только по counts)
             
         Returns:
             dict с результатами валидации
@@ -111,7 +113,8 @@ class MultiPlatformValidator:
                 reddit_validation = self.platforms['reddit'].validate_saas_idea(
                     idea_keywords=keywords,
                     relevant_subreddits=subreddits,
-                    output_file=f'{output_dir}/reddit_validation.json'
+                    output_file=f'{output_dir}/reddit_validation.json',
+                    competitor_names=competitor_names
                 )
                 
                 results['platforms_analyzed'].append('reddit')
@@ -120,7 +123,8 @@ class MultiPlatformValidator:
                     'pain_points': reddit_validation.get('pain_points_found', 0),
                     'market_size': reddit_validation.get('market_size_estimate', 0),
                     'score': reddit_validation.get('validation_score', 0),
-                    'verdict': reddit_validation.get('verdict', '')
+                    'verdict': reddit_validation.get('verdict', ''),
+                    'top_domains': reddit_validation.get('top_domains', {})
                 }
                 
                 platform_scores['reddit'] = reddit_validation.get('validation_score', 0)
@@ -138,27 +142,43 @@ class MultiPlatformValidator:
             print("-" * 70)
             
             try:
-                twitter_report, twitter_df = self.platforms['twitter'].generate_report(
-                    keywords=keywords,
-                    output_file=f'{output_dir}/twitter_analysis.json'
-                )
+                twitter = self.platforms['twitter']
+                
+                # Объем по всем ключевым словам - через counts endpoint (без расхода лимита твитов),
+                # полные твиты скачиваются только для самых обсуждаемых
+                volume = twitter.count_tweets(keywords)
+                report_keywords = twitter.top_keywords(volume, twitter_top_keywords) if volume else keywords
+                tweet_volume = sum(counts['total'] for counts in volume.values())
+                
+                if volume:
+                    print(f"  📈 Объем за 7 дней: {tweet_volume:,} твитов, "
+                          f"полный анализ: {', '.join(report_keywords) or '-'}")
+                
+                twitter_report = None
+                if report_keywords:
+                    twitter_report, twitter_df = twitter.generate_report(
+                        keywords=report_keywords,
+                        output_file=f'{output_dir}/twitter_analysis.json',
+                        competitor_names=competitor_names
+                    )
                 
                 if twitter_report:
                     results['platforms_analyzed'].append('twitter')
                     results['twitter_data'] = {
                         'tweets_found': twitter_report.get('total_tweets', 0),
+                        'tweet_volume': tweet_volume if volume else twitter_report.get('total_tweets', 0),
+                        'volume_by_keyword': {keyword: counts['total'] for keyword, counts in volume.items()},
+                        'keywords_downloaded': report_keywords,
                         'pain_points': twitter_report.get('pain_points_count', 0),
                         'avg_engagement': twitter_report.get('engagement_stats', {}).get('avg_likes', 0),
                         'total_engagement': twitter_report.get('engagement_stats', {}).get('total_engagement', 0),
-                        'top_hashtags': list(twitter_report.get('top_hashtags', {}).keys())[:5]
+                        'top_hashtags': list(twitter_report.get('top_hashtags', {}).keys())[:5],
+                        'top_domains': twitter_report.get('top_domains', {})
                     }
                     
-                    # Scoring для Twitter (0-100)
-                    twitter_score = 0
-                    if results['twitter_data']['tweets_found'] > 50:
-                        twitter_score += 30
-                    elif results['twitter_data']['tweets_found'] > 20:
-                        twitter_score += 20
+                    # Scoring для Twitter (0-100): объем - по counts самого обсуждаемого ключевого слова
+                    # (сумма по словам считала бы пересекающиеся твиты несколько раз)
+                    twitter_score = self._twitter_volume_score(volume, results['twitter_data']['tweets_found'])
                     
                     if results['twitter_data']['pain_points'] > 10:
                         twitter_score += 30
@@ -182,6 +202,20 @@ class MultiPlatformValidator:
                           f"{results['twitter_data']['pain_points']} pain points")
                     print(f"  📊 Оценка: {twitter_score}/100")
                 
+                elif volume and not report_keywords:
+                    # Ни одного твита за неделю - это нулевая оценка Twitter, а не отсутствие платформы
+                    results['platforms_analyzed'].append('twitter')
+                    results['twitter_data'] = {
+                        'tweets_found': 0,
+                        'tweet_volume': 0,
+                        'volume_by_keyword': {keyword: counts['total'] for keyword, counts in volume.items()},
+                        'keywords_downloaded': [],
+                        'score': 0
+                    }
+                    platform_scores['twitter'] = 0
+                    print("  ⚠️ Twitter: твитов по ключевым словам за 7 дней нет")
+                    print("  📊 Оценка: 0/100")
+                
             except Exception as e:
                 print(f"  ❌ Ошибка Twitter: {e}")
         
@@ -215,6 +249,13 @@ class MultiPlatformValidator:
             except Exception as e:
                 print(f"  ❌ Ошибка LinkedIn: {e}")
         
+        # ============ ДОМЕНЫ ПО ВСЕМ ПЛАТФОРМАМ ============
+        # Одни и те же сайты в ссылках на Reddit и Twitter - вероятные конкуренты
+        domain_counts = Counter()
+        for platform_data in (results['reddit_data'], results['twitter_data']):
+            domain_counts.update(platform_data.get('top_domains', {}))
+        results['top_domains'] = dict(domain_counts.most_common(20))
+        
         # ============ ОБЩАЯ ОЦЕНКА ============
         if platform_scores:
             # Средневзвешенная оценка
@@ -252,6 +293,26 @@ class MultiPlatformValidator:
             results['verdict'] = "❌ НЕТ ДАННЫХ"
             return results
     
+    @staticmethod
+    def _twitter_volume_score(volume, tweets_found):
+        """
+        Баллы Twitter за объем обсуждения (0-30)
+        
+        По недельным counts самого обсуждаемого ключевого слова, ступени в 10 раз:
+        50+ твитов - 10, 500+ - 20, 5000+ - 30. Без counts - по скачанным твитам.
+        """
+        if not volume:
+            if tweets_found > 50:
+                return 30
+            return 20 if tweets_found > 20 else 0
+        
+        peak = max(counts['total'] for counts in volume.values())
+        if peak >= 5000:
+            return 30
+        if peak >= 500:
+            return 20
+        return 10 if peak >= 50 else 0
+    
     def _generate_insights(self, results):
         """Генерирует ключевые инсайты на основе результатов"""
         insights = []
@@ -281,6 +342,11 @@ class MultiPlatformValidator:
             if linkedin_data.get('competitors', 0) > 0:
                 insights.append(f"Найдено {linkedin_data['competitors']} конкурентов - рынок существует")
         
+        # Кросс-платформенные инсайты
+        if results.get('top_domains'):
+            top_domains = list(results['top_domains'])[:3]
+            insights.append(f"Чаще всего ссылаются на: {', '.join(top_domains)} - проверьте как конкурентов")
+        
         # Общие инсайты
         if results['overall_score'] >= 70:
             insights.append("Идея показывает сильные сигналы валидации на нескольких платформах")
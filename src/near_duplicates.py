@@ -0,0 +1,220 @@
+"""
+Поиск и схлопывание почти-дубликатов (MinHash + LSH)
+
+Кросспосты, повторно заданные вопросы и копии твитов отличаются id, но не
+текстом. Для каждого текста считается MinHash сигнатура по шинглам из трех
+слов, сигнатуры разбиваются на полосы (LSH banding): тексты с совпавшей
+полосой становятся кандидатами, кандидаты с оценкой Jaccard не ниже порога
+связываются, а связные компоненты графа - кластеры почти-дубликатов.
+
+Всё считается numpy массивами по пачкам текстов, без сравнения пар в Python,
+поэтому подходит для миллиона постов в памяти.
+"""
+
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Хэши слов и шинглов приводятся к 31 биту
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+class MinHashLSH:
+    """
+    MinHash сигнатуры и LSH кластеризация текстов
+
+    Пример:
+        labels = MinHashLSH().cluster_labels(posts_df['title'] + ' ' + posts_df['text'])
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.8, shingle_size=3, chunk_size=100000, seed=1):
+        """
+        Args:
+            num_perm: длина сигнатуры
+            bands: число полос LSH (num_perm должно делиться на bands)
+            threshold: минимальная оценка Jaccard для связи кандидатов
+            shingle_size: слов в шингле (короткие тексты - по одному слову)
+            chunk_size: текстов в пачке при расчете сигнатур
+            seed: seed хэш-функций (одинаковый seed - сравнимые сигнатуры)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.chunk_size = chunk_size
+
+        # Хэш-функции multiply-shift: (a * x + b) mod 2^64, старшие 32 бита
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+
+    def _shingles(self, texts):
+        """
+        Хэши шинглов и номер текста для каждого шингла (отсортированы по тексту)
+        """
+        token_lists = [_TOKEN_RE.findall(text.lower()) if isinstance(text, str) else [] for text in texts]
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+
+        tokens = np.empty(int(lengths.sum()), dtype=object)
+        tokens[:] = list(chain.from_iterable(token_lists))
+        token_ids = pd.util.hash_array(tokens).astype(np.uint64) % _PRIME
+
+        doc_ids = np.repeat(np.arange(len(token_lists)), lengths)
+        starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = np.arange(len(tokens)) - starts
+
+        k = self.shingle_size
+        # Шингл начинается в позиции, если до конца текста хватает k слов;
+        # текст короче k слов представлен своими словами
+        long_doc = np.repeat(lengths >= k, lengths)
+        valid = np.where(long_doc, positions <= np.repeat(lengths - k, lengths), True)
+
+        shingles = token_ids.copy()
+        for offset in range(1, k):
+            shifted = np.zeros_like(token_ids)
+            shifted[:-offset] = token_ids[offset:]
+            shingles = np.where(long_doc, (shingles * np.uint64(1000003) + shifted) % _PRIME, shingles)
+
+        return shingles[valid], doc_ids[valid]
+
+    def signatures(self, texts):
+        """
+        MinHash сигнатуры
+
+        Returns:
+            numpy uint32 массив (len(texts), num_perm); у пустых текстов - максимум uint32
+        """
+        texts = list(texts)
+        result = np.full((len(texts), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+
+        for start in range(0, len(texts), self.chunk_size):
+            shingles, doc_ids = self._shingles(texts[start:start + self.chunk_size])
+            if not len(shingles):
+                continue
+
+            # Начала групп шинглов каждого текста (doc_ids отсортированы)
+            group_starts = np.flatnonzero(np.r_[True, doc_ids[1:] != doc_ids[:-1]])
+            group_docs = start + doc_ids[group_starts]
+
+            for perm in range(self.num_perm):
+                hashes = (self._a[perm] * shingles + self._b[perm]) >> np.uint64(32)
+                result[group_docs, perm] = np.minimum.reduceat(hashes, group_starts)
+
+        return result
+
+    def cluster_labels(self, texts):
+        """
+        Номер кластера почти-дубликатов для каждого текста
+
+        Returns:
+            numpy int массив; тексты одного кластера имеют одинаковый номер
+        """
+        signatures = self.signatures(texts)
+        n = len(signatures)
+        if n == 0:
+            return np.empty(0, dtype=np.int32)
+
+        empty = (signatures == np.iinfo(np.uint32).max).all(axis=1)
+        multipliers = np.random.default_rng(0).integers(1, 1 << 62, self.rows, dtype=np.uint64) | np.uint64(1)
+
+        sources = []
+        targets = []
+
+        for band in range(self.bands):
+            columns = signatures[:, band * self.rows:(band + 1) * self.rows].astype(np.uint64)
+            keys = (columns * multipliers).sum(axis=1)
+
+            order = np.argsort(keys, kind='stable')
+            order = order[~empty[order]]
+            sorted_keys = keys[order]
+
+            # Каждый текст корзины связываем с первым текстом этой корзины
+            same = np.r_[False, sorted_keys[1:] == sorted_keys[:-1]]
+            bucket_first = order[np.maximum.accumulate(np.where(~same, np.arange(len(order)), 0))]
+            sources.append(bucket_first[same])
+            targets.append(order[same])
+
+        sources = np.concatenate(sources)
+        targets = np.concatenate(targets)
+
+        if len(sources):
+            pairs = np.unique(np.stack([sources, targets], axis=1), axis=0)
+            sources, targets = pairs[:, 0], pairs[:, 1]
+
+            # Проверяем кандидатов оценкой Jaccard по полной сигнатуре
+            similarity = (signatures[sources] == signatures[targets]).mean(axis=1)
+            keep = similarity >= self.threshold
+            sources, targets = sources[keep], targets[keep]
+
+        graph = sparse.coo_matrix((np.ones(len(sources), dtype=bool), (sources, targets)), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        return labels
+
+
+def collapse_near_duplicates(df, text_columns=('title', 'text'), sum_columns=(), list_columns=(),
+                             rank_column='engagement', lsh=None):
+    """
+    Схлопнуть кластеры почти-дубликатов до одного представителя
+
+    Представитель - запись с максимальным rank_column; его sum_columns
+    заменяются суммой по кластеру, list_columns - объединением списков.
+    Добавляется колонка duplicates - размер кластера.
+
+    Args:
+        df: DataFrame постов или твитов
+        text_columns: колонки, склеиваемые в сравниваемый текст
+        sum_columns: метрики, суммируемые по кластеру (engagement, score, ...)
+        list_columns: колонки со списками, объединяемые по кластеру
+        rank_column: по какой колонке выбирать представителя
+        lsh: MinHashLSH (по умолчанию - с параметрами по умолчанию)
+
+    Returns:
+        DataFrame представителей в исходном порядке
+    """
+    if df.empty:
+        return df
+
+    texts = df[text_columns[0]].fillna('').astype(str)
+    for column in text_columns[1:]:
+        texts = texts + ' ' + df[column].fillna('').astype(str)
+
+    labels = (lsh or MinHashLSH()).cluster_labels(texts)
+    df = df.reset_index(drop=True)
+    clusters = df.groupby(labels, sort=False)
+
+    # Представитель кластера - запись с максимальным rank_column (при равенстве - первая)
+    rank = df[rank_column].to_numpy() if rank_column in df else np.zeros(len(df))
+    order = np.lexsort((np.arange(len(df)), -rank, labels))
+    first_in_cluster = np.r_[True, labels[order][1:] != labels[order][:-1]]
+    collapsed = df.loc[np.sort(order[first_in_cluster])].copy()
+    collapsed_labels = labels[collapsed.index]
+
+    for column in sum_columns:
+        totals = clusters[column].sum()
+        collapsed[column] = totals.loc[collapsed_labels].to_numpy().astype(df[column].dtype)
+
+    sizes = clusters.size()
+    collapsed['duplicates'] = sizes.loc[collapsed_labels].to_numpy()
+
+    # Списки объединяем только у настоящих кластеров - одиночек большинство
+    in_cluster = np.isin(labels, sizes.index[sizes.to_numpy() > 1])
+    for column in list_columns:
+        merged = df.loc[in_cluster, column].groupby(labels[in_cluster]).agg(
+            lambda lists: list(dict.fromkeys(item for items in lists for item in items))
+        )
+        is_merged = collapsed['duplicates'].to_numpy() > 1
+        values = collapsed[column].to_numpy(dtype=object).copy()
+        values[is_merged] = merged.loc[collapsed_labels[is_merged]].to_numpy()
+        collapsed[column] = values
+
+    return collapsed.reset_index(drop=True)
@@ -0,0 +1,195 @@
+"""
+Взвешенная оценка силы болевого сигнала в постах
+
+Вместо бинарного "есть маркер / нет маркера" каждый пост получает число:
+сумму весов найденных маркеров с учетом
+- отрицаний перед маркером ("not a problem", "never slow"),
+- усилителей перед маркером ("really frustrated", "extremely slow"),
+- поля: маркер в заголовке весит больше, чем в тексте.
+
+Маркеры совпадают подстрокой, как в find_pain_points (KeywordMatcher):
+'need' засчитывается и в "needed", поэтому каждый пост с болевой точкой
+получает ненулевую оценку (если маркер не отрицается).
+
+Все посты считаются за один проход: тексты индексируются один раз
+(InvertedIndex), вхождения маркеров и модификаторов берутся из posting lists,
+а ближайший модификатор перед каждым маркером находится searchsorted по
+ключам (документ, позиция) - без цикла по постам.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .inverted_index import InvertedIndex
+
+PainScores = namedtuple('PainScores', ['scores', 'term_scores'])
+
+
+class PainSignalScorer:
+    """
+    Оценка болевого сигнала
+
+    Пример:
+        scorer = PainSignalScorer()
+        posts_df['pain_score'] = scorer.score_frame(posts_df)
+    """
+
+    # Вес маркера: явная фрустрация > описание проблемы > поиск решения
+    DEFAULT_WEIGHTS = {
+        'nightmare': 3.0, 'hate': 2.5, 'terrible': 2.5, 'awful': 2.5, 'sucks': 2.5,
+        'frustrated': 2.5, 'struggling': 2.0, 'tired of': 2.0, 'broken': 2.0,
+        'waste time': 2.0, 'wasting time': 2.0, 'annoying': 2.0,
+        'problem': 1.5, 'issue': 1.0, 'difficult': 1.5, 'pain': 1.5,
+        'slow': 1.0, 'expensive': 1.0, 'costly': 1.0, 'complicated': 1.5,
+        'confusing': 1.5, 'missing': 1.0,
+        'wish': 0.75, 'need': 0.5, 'help': 0.5, 'advice': 0.5, 'how to': 0.5,
+        'anyone know': 0.75, 'recommend': 0.5, 'alternative': 0.75, 'better than': 0.75,
+    }
+
+    # Токены (по \w+), отменяющие маркер: "isn't" разбивается на "isn" и "t"
+    NEGATIONS = [
+        'not', 'no', 'never', 'without', 'hardly', 'nothing', 'cannot',
+        'isn', 'wasn', 'aren', 'weren', 'don', 'doesn', 'didn', 'won', 'wouldn',
+    ]
+
+    INTENSIFIERS = {
+        'very': 1.5, 'really': 1.5, 'so': 1.3, 'too': 1.3, 'super': 1.5, 'such': 1.3,
+        'extremely': 2.0, 'incredibly': 2.0, 'absolutely': 1.8, 'totally': 1.5, 'constantly': 1.5,
+    }
+
+    def __init__(self, weights=None, negation_window=3, intensifier_window=2,
+                 negation_factor=0.0, title_weight=2.0, text_weight=1.0):
+        """
+        Args:
+            weights: dict {маркер: вес} (по умолчанию DEFAULT_WEIGHTS)
+            negation_window: на сколько токенов назад от маркера искать отрицание
+            intensifier_window: на сколько токенов назад искать усилитель
+            negation_factor: множитель веса отрицаемого маркера (0 - не учитывать)
+            title_weight: множитель для маркеров в заголовке
+            text_weight: множитель для маркеров в тексте
+        """
+        self.weights = dict(weights or self.DEFAULT_WEIGHTS)
+        self.negation_window = negation_window
+        self.intensifier_window = intensifier_window
+        self.negation_factor = negation_factor
+        self.title_weight = title_weight
+        self.text_weight = text_weight
+
+    @staticmethod
+    def _modifier_keys(index, words, factors=None):
+        """
+        Отсортированные ключи (документ << 32) + позиция вхождений слов и их множители
+        """
+        keys = []
+        values = []
+
+        for word in words:
+            doc_ids, positions = index.occurrences(word)
+            keys.append((doc_ids.astype(np.int64) << 32) + positions)
+            values.append(np.full(len(doc_ids), factors[word] if factors else 1.0))
+
+        if not keys:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        keys = np.concatenate(keys)
+        values = np.concatenate(values)
+        order = np.argsort(keys, kind='stable')
+        return keys[order], values[order]
+
+    @staticmethod
+    def _nearest_before(modifier_keys, hit_keys, window):
+        """
+        Для каждого вхождения маркера - индекс ближайшего модификатора не дальше
+        window токенов перед ним в том же документе (-1, если такого нет)
+        """
+        if len(modifier_keys) == 0:
+            return np.full(len(hit_keys), -1)
+
+        nearest = np.searchsorted(modifier_keys, hit_keys, side='left') - 1
+        found = nearest >= 0
+        # Разница ключей <= window возможна только внутри одного документа
+        distance = hit_keys - modifier_keys[np.maximum(nearest, 0)]
+        return np.where(found & (distance <= window), nearest, -1)
+
+    def _score_field(self, texts):
+        """
+        Вклад каждого (документ, маркер) для одного поля
+
+        Returns:
+            DataFrame с колонками doc, term, score
+        """
+        index = InvertedIndex(texts)
+        terms = list(self.weights)
+
+        hit_docs = []
+        hit_keys = []
+        hit_terms = []
+
+        for term_id, term in enumerate(terms):
+            doc_ids, positions = index.occurrences(term, substring=True)
+            hit_docs.append(doc_ids)
+            hit_keys.append((doc_ids.astype(np.int64) << 32) + positions)
+            hit_terms.append(np.full(len(doc_ids), term_id, dtype=np.int32))
+
+        hit_docs = np.concatenate(hit_docs)
+        hit_keys = np.concatenate(hit_keys)
+        hit_terms = np.concatenate(hit_terms)
+        weights = np.array([self.weights[term] for term in terms])[hit_terms]
+
+        negation_keys, _ = self._modifier_keys(index, self.NEGATIONS)
+        negated = self._nearest_before(negation_keys, hit_keys, self.negation_window) >= 0
+        weights = np.where(negated, weights * self.negation_factor, weights)
+
+        intensifier_keys, factors = self._modifier_keys(index, self.INTENSIFIERS, self.INTENSIFIERS)
+        nearest = self._nearest_before(intensifier_keys, hit_keys, self.intensifier_window)
+        if len(factors):
+            weights = weights * np.where(nearest >= 0, factors[np.maximum(nearest, 0)], 1.0)
+
+        hits = pd.DataFrame({'doc': hit_docs, 'term': hit_terms, 'score': weights})
+        # Повтор маркера в одном поле не усиливает сигнал - берем самое сильное вхождение
+        return hits.groupby(['doc', 'term'], as_index=False)['score'].max()
+
+    def score(self, titles, texts):
+        """
+        Оценка болевого сигнала для всех постов
+
+        Args:
+            titles: заголовки (итерируемое строк, можно None для твитов)
+            texts: тексты постов
+
+        Returns:
+            PainScores(scores - numpy float массив в порядке постов,
+                       term_scores - dict {маркер: суммарный вклад})
+        """
+        texts = list(texts)
+        fields = [(texts, self.text_weight)]
+        if titles is not None:
+            fields.append((list(titles), self.title_weight))
+
+        terms = np.array(list(self.weights), dtype=object)
+        scores = np.zeros(len(texts))
+        term_scores = np.zeros(len(terms))
+
+        for field_texts, field_weight in fields:
+            hits = self._score_field(field_texts)
+            contribution = hits['score'].to_numpy() * field_weight
+            scores += np.bincount(hits['doc'], weights=contribution, minlength=len(texts))
+            term_scores += np.bincount(hits['term'], weights=contribution, minlength=len(terms))
+
+        return PainScores(
+            scores,
+            {term: round(float(total), 2) for term, total in zip(terms, term_scores) if total > 0}
+        )
+
+    def score_frame(self, df, title_column='title', text_column='text'):
+        """
+        Колонка pain_score для DataFrame постов
+
+        Returns:
+            pandas Series float с индексом df
+        """
+        titles = df[title_column] if title_column in df else None
+        result = self.score(titles, df[text_column])
+        return pd.Series(result.scores, index=df.index, name='pain_score')
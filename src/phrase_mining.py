@@ -0,0 +1,283 @@
+"""
+Потоковый поиск характерных фраз (n-граммы) в болевых постах
+
+Вместо подсчета заранее заданных маркеров считаются все фразы из 1-4 слов:
+- частоты фраз хранятся в count-min sketch фиксированного размера - память не
+  растет с объемом корпуса и длиной хвоста редких фраз;
+- текст храним только для ограниченного числа кандидатов с наибольшей
+  оценкой частоты (heavy hitters);
+- фразы ранжируются по lift/PMI относительно фонового корпуса с теми же
+  хэш-функциями: "export to csv" в болевых постах встречается намного чаще,
+  чем во всех постах, а "i have" - так же часто.
+
+Тексты обрабатываются пачками (update), поэтому корпус может быть любого размера.
+Частота фразы - число документов, в которых она встречается.
+"""
+
+import math
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Фраза не начинается и не заканчивается служебным словом ("of the", "the export")
+STOPWORDS = frozenset("""
+a an the and or but if then so of to in on at for with from by about as into over
+is are was were be been being am do does did have has had i me my we our you your
+he she it its they them their this that these those there here what which who whom
+not no can could would should will just very really also too than up out all any
+some more most much many how when where why get got s t m re ve ll d
+""".split())
+
+# Множитель для склейки хэшей слов в хэш фразы (по модулю 2^64)
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+class CountMinSketch:
+    """
+    Count-min sketch: оценка частоты сверху с ошибкой ~ total / width
+    """
+
+    def __init__(self, width=2 ** 20, depth=4, seed=7):
+        """
+        Args:
+            width: счетчиков в строке
+            depth: число строк (независимых хэш-функций)
+            seed: seed хэш-функций; сравнивать можно только sketch с одинаковыми параметрами
+        """
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int32)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 63, depth, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, depth, dtype=np.uint64)
+
+    def _buckets(self, row, hashes):
+        return ((self._a[row] * hashes + self._b[row]) >> np.uint64(32)) % np.uint64(self.width)
+
+    def add(self, hashes, counts):
+        """
+        Прибавить counts к частотам hashes (hashes уникальны)
+
+        Conservative update: счетчик поднимается только до новой оценки
+        элемента, поэтому коллизии завышают частоты заметно меньше
+        """
+        estimates = self.query(hashes) + counts
+        for row in range(self.depth):
+            np.maximum.at(self.table[row], self._buckets(row, hashes).astype(np.int64), estimates.astype(np.int32))
+
+    def query(self, hashes):
+        """
+        Оценка частоты для каждого хэша
+        """
+        estimates = np.full(len(hashes), np.iinfo(np.int64).max, dtype=np.int64)
+        for row in range(self.depth):
+            np.minimum(estimates, self.table[row][self._buckets(row, hashes).astype(np.int64)], out=estimates)
+        return estimates
+
+
+class PhraseMiner:
+    """
+    Потоковый счетчик n-грамм с ограниченной памятью
+
+    Пример:
+        pain = PhraseMiner()
+        background = PhraseMiner()
+        pain.update(pain_posts['title'] + ' ' + pain_posts['text'])
+        background.update(all_posts['title'] + ' ' + all_posts['text'])
+        pain.top_phrases(background, limit=20)
+    """
+
+    def __init__(self, max_n=4, min_count=3, capacity=20000, width=2 ** 20, depth=4, seed=7):
+        """
+        Args:
+            max_n: максимальная длина фразы в словах
+            min_count: минимальное число документов, чтобы фраза стала кандидатом
+            capacity: сколько кандидатов хранить с текстом фразы (0 - только счетчик,
+                например для фонового корпуса)
+            width, depth, seed: параметры count-min sketch (у фонового корпуса должны совпадать)
+        """
+        self.max_n = max_n
+        self.min_count = min_count
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth, seed)
+        self.documents = 0
+        self._candidates = {}
+
+    def _ngrams(self, texts):
+        """
+        Уникальные в пределах документа n-граммы пачки
+
+        Returns:
+            (хэши, число документов, токены пачки, начало и длина первого вхождения)
+        """
+        token_lists = [_TOKEN_RE.findall(text.lower()) if isinstance(text, str) else [] for text in texts]
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+
+        tokens = np.empty(int(lengths.sum()), dtype=object)
+        tokens[:] = list(chain.from_iterable(token_lists))
+        token_hashes = pd.util.hash_array(tokens, categorize=True)
+        is_stop = np.fromiter((token in STOPWORDS for token in tokens), dtype=bool, count=len(tokens))
+
+        doc_ids = np.repeat(np.arange(len(token_lists)), lengths)
+        remaining = np.repeat(np.cumsum(lengths), lengths) - np.arange(len(tokens))
+
+        all_hashes = []
+        all_starts = []
+        all_sizes = []
+
+        hashes = token_hashes.copy()
+        for n in range(1, self.max_n + 1):
+            if n > 1:
+                shifted = np.zeros_like(token_hashes)
+                shifted[:-(n - 1)] = token_hashes[n - 1:]
+                hashes = hashes * _MULTIPLIER + shifted
+
+            last = np.zeros_like(is_stop)
+            last[:len(is_stop) - n + 1] = is_stop[n - 1:]
+            starts = np.flatnonzero((remaining >= n) & ~is_stop & ~last)
+
+            all_hashes.append(hashes[starts])
+            all_starts.append(starts)
+            all_sizes.append(np.full(len(starts), n))
+
+        hashes = np.concatenate(all_hashes)
+        starts = np.concatenate(all_starts)
+        sizes = np.concatenate(all_sizes)
+
+        # Пачка из пустых текстов или одних служебных слов
+        if not len(hashes):
+            empty = np.empty(0, dtype=np.int64)
+            return np.empty(0, dtype=np.uint64), empty, tokens, empty, empty
+
+        # Повтор фразы в том же документе не считаем: ключ (документ, фраза) одним uint64
+        doc_keys = hashes ^ (doc_ids[starts].astype(np.uint64) * _MULTIPLIER)
+        unique = ~pd.Series(doc_keys).duplicated().to_numpy()
+        hashes, starts, sizes = hashes[unique], starts[unique], sizes[unique]
+
+        codes, uniques = pd.factorize(hashes)
+        counts = np.bincount(codes)
+        first = np.unique(codes, return_index=True)[1]
+
+        return uniques.astype(np.uint64), counts, tokens, starts[first], sizes[first]
+
+    def update(self, texts, batch_size=50000):
+        """
+        Добавить тексты в счетчик (пачками по batch_size)
+        """
+        texts = list(texts)
+
+        for offset in range(0, len(texts), batch_size):
+            batch = texts[offset:offset + batch_size]
+            self.documents += len(batch)
+            if not batch:
+                continue
+
+            hashes, counts, tokens, starts, sizes = self._ngrams(batch)
+            if not len(hashes):
+                continue
+
+            self.sketch.add(hashes, counts)
+
+            if not self.capacity:
+                continue
+
+            # Текст фразы запоминаем только для самых частых n-грамм пачки
+            estimates = self.sketch.query(hashes)
+            frequent = np.flatnonzero(estimates >= self.min_count)
+            frequent = frequent[np.argsort(-estimates[frequent], kind='stable')[:self.capacity]]
+            for index in frequent:
+                key = int(hashes[index])
+                if key not in self._candidates:
+                    self._candidates[key] = ' '.join(tokens[starts[index]:starts[index] + sizes[index]])
+
+            if len(self._candidates) > self.capacity:
+                self._prune()
+
+        return self
+
+    def _prune(self):
+        keys = np.fromiter(self._candidates, dtype=np.uint64, count=len(self._candidates))
+        estimates = self.sketch.query(keys)
+        keep = keys[np.argsort(-estimates, kind='stable')[:self.capacity]]
+        self._candidates = {int(key): self._candidates[int(key)] for key in keep}
+
+    def count(self, phrase):
+        """
+        Оценка числа документов с фразой
+        """
+        tokens = _TOKEN_RE.findall(phrase.lower())
+        if not tokens:
+            return 0
+
+        token_hashes = pd.util.hash_array(np.array(tokens, dtype=object), categorize=True)
+        key = token_hashes[:1]
+        for token_hash in token_hashes[1:]:
+            key = key * _MULTIPLIER + token_hash
+        return int(self.sketch.query(key)[0])
+
+    def top_phrases(self, background=None, limit=20, min_count=None):
+        """
+        Самые характерные фразы
+
+        Args:
+            background: PhraseMiner фонового корпуса (None - ранжирование по частоте)
+            limit: сколько фраз вернуть
+            min_count: минимальное число документов (по умолчанию - self.min_count)
+
+        Returns:
+            список dict {'phrase', 'count', 'background_count', 'lift', 'pmi'},
+            отсортированный по PMI (без фона - по count, lift и pmi равны None)
+        """
+        min_count = self.min_count if min_count is None else min_count
+        if not self._candidates:
+            return []
+
+        keys = np.fromiter(self._candidates, dtype=np.uint64, count=len(self._candidates))
+        phrases = np.array([self._candidates[int(key)] for key in keys], dtype=object)
+        counts = self.sketch.query(keys)
+
+        selected = counts >= min_count
+        keys, phrases, counts = keys[selected], phrases[selected], counts[selected]
+
+        if background is not None:
+            # Сглаживание +1: фраза, которой нет в фоне, не дает бесконечный lift
+            background_counts = background.sketch.query(keys)
+            lift = (counts / max(self.documents, 1)) / ((background_counts + 1) / (background.documents + 1))
+            order = np.lexsort((-counts, -lift))
+        else:
+            background_counts = np.zeros(len(keys), dtype=np.int64)
+            lift = np.ones(len(keys))
+            order = np.argsort(-counts, kind='stable')
+
+        # Подфраза почти с той же частотой и lift, что у более длинной фразы, ничего не добавляет:
+        # "export" и "csv" схлопываются в "cannot export to csv"
+        shortlist = order[:limit * 5]
+        padded = {index: f' {phrases[index]} ' for index in shortlist}
+        subsumed = {
+            index for index in shortlist
+            for other in shortlist
+            if other != index and padded[index] in padded[other]
+            and counts[other] >= 0.9 * counts[index] and lift[other] >= 0.9 * lift[index]
+        }
+
+        result = []
+        for index in shortlist:
+            if index in subsumed:
+                continue
+
+            result.append({
+                'phrase': phrases[index],
+                'count': int(counts[index]),
+                'background_count': int(background_counts[index]),
+                'lift': round(float(lift[index]), 2) if background is not None else None,
+                'pmi': round(math.log2(lift[index]), 2) if background is not None else None,
+            })
+            if len(result) >= limit:
+                break
+
+        return result
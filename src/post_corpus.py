@@ -0,0 +1,294 @@
+"""
+Локальный корпус постов с checkpoint'ами для инкрементальной ревалидации
+
+Хранит собранные посты (в порядке колонок схемы PostStore) и для каждого
+(scope, query) - самый новый увиденный пост. Повторная валидация докачивает
+только посты новее checkpoint'а и объединяет их с сохраненным корпусом.
+
+Для scope, которые непрерывно наполняются потоком (ingestion mode), хранится
+покрытие: с какого момента корпус содержит все посты scope и когда поток
+последний раз подтверждал, что жив (heartbeat).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .post_store import PostStore, REDDIT_POST_SCHEMA
+
+
+class PostCorpus:
+    """
+    SQLite корпус постов одной платформы
+    """
+
+    def __init__(self, path, platform='reddit', schema=REDDIT_POST_SCHEMA,
+                 id_column='id', time_column='created_utc'):
+        """
+        Args:
+            path: путь к файлу базы
+            platform: платформа (несколько платформ могут жить в одном файле)
+            schema: схема PostStore для записей
+            id_column: колонка с id поста
+            time_column: колонка с unix timestamp создания
+        """
+        self.path = path
+        self.platform = platform
+        self.schema = list(schema)
+
+        columns = [name for name, _ in self.schema]
+        self._id_index = columns.index(id_column)
+        self._time_index = columns.index(time_column)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS corpus_posts (
+                platform TEXT NOT NULL,
+                id TEXT NOT NULL,
+                created_utc REAL NOT NULL,
+                row TEXT NOT NULL,
+                PRIMARY KEY (platform, id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_corpus_posts_created ON corpus_posts (platform, created_utc);
+            CREATE TABLE IF NOT EXISTS corpus_query_posts (
+                platform TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                query TEXT NOT NULL,
+                id TEXT NOT NULL,
+                PRIMARY KEY (platform, scope, query, id)
+            );
+            CREATE TABLE IF NOT EXISTS corpus_checkpoints (
+                platform TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                query TEXT NOT NULL,
+                newest_created REAL NOT NULL,
+                newest_id TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (platform, scope, query)
+            );
+            CREATE TABLE IF NOT EXISTS corpus_coverage (
+                platform TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                covered_from REAL NOT NULL,
+                heartbeat_at REAL NOT NULL,
+                PRIMARY KEY (platform, scope)
+            );
+        """)
+        self._conn.commit()
+
+    def get_checkpoint(self, scope, query):
+        """
+        Самый новый пост, увиденный для (scope, query)
+
+        Returns:
+            (newest_created, newest_id) или None, если запрос еще не собирался
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT newest_created, newest_id FROM corpus_checkpoints '
+                'WHERE platform = ? AND scope = ? AND query = ?',
+                (self.platform, scope, query)
+            ).fetchone()
+
+        return tuple(row) if row else None
+
+    def save_checkpoint(self, scope, query, newest_created, newest_id):
+        """
+        Сохранить checkpoint для (scope, query)
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO corpus_checkpoints '
+                '(platform, scope, query, newest_created, newest_id, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (self.platform, scope, query, newest_created, str(newest_id), time.time())
+            )
+            self._conn.commit()
+
+    def get_coverage(self, scope):
+        """
+        Покрытие scope потоком
+
+        Returns:
+            (covered_from, heartbeat_at) или None, если scope не наполняется потоком
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT covered_from, heartbeat_at FROM corpus_coverage WHERE platform = ? AND scope = ?',
+                (self.platform, scope)
+            ).fetchone()
+
+        return tuple(row) if row else None
+
+    def save_coverage(self, scope, covered_from, heartbeat_at=None):
+        """
+        Сохранить покрытие: корпус содержит все посты scope с covered_from
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO corpus_coverage (platform, scope, covered_from, heartbeat_at) '
+                'VALUES (?, ?, ?, ?)',
+                (self.platform, scope, covered_from, heartbeat_at if heartbeat_at is not None else time.time())
+            )
+            self._conn.commit()
+
+    def heartbeat(self, scopes, at=None):
+        """
+        Отметить, что поток по scopes жив и корпус актуален на момент at
+        """
+        at = at if at is not None else time.time()
+
+        with self._lock:
+            self._conn.executemany(
+                'UPDATE corpus_coverage SET heartbeat_at = ? WHERE platform = ? AND scope = ?',
+                [(at, self.platform, scope) for scope in scopes]
+            )
+            self._conn.commit()
+
+    def covered_scopes(self, scopes, since, max_lag):
+        """
+        Какие из scopes покрыты потоком на всё окно анализа
+
+        Args:
+            scopes: кандидаты
+            since: начало окна (unix timestamp) - покрытие должно начинаться не позже
+            max_lag: максимальный возраст heartbeat в секундах
+
+        Returns:
+            список покрытых scopes в исходном порядке
+        """
+        scopes = list(scopes)
+        if not scopes:
+            return []
+
+        placeholders = ','.join('?' * len(scopes))
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT scope FROM corpus_coverage WHERE platform = ? AND scope IN ({placeholders}) '
+                f'AND covered_from <= ? AND heartbeat_at >= ?',
+                [self.platform, *scopes, since, time.time() - max_lag]
+            ).fetchall()
+
+        covered = {scope for (scope,) in rows}
+        return [scope for scope in scopes if scope in covered]
+
+    def add_rows(self, rows, scope=None, query=None):
+        """
+        Добавить или обновить записи (upsert по id)
+
+        Args:
+            rows: кортежи в порядке схемы
+            scope, query: если заданы, записи привязываются к этому запросу
+        """
+        rows = list(rows)
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO corpus_posts (platform, id, created_utc, row) VALUES (?, ?, ?, ?)',
+                [
+                    (self.platform, str(row[self._id_index]), row[self._time_index], json.dumps(list(row)))
+                    for row in rows
+                ]
+            )
+
+            if scope is not None and query is not None:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO corpus_query_posts (platform, scope, query, id) VALUES (?, ?, ?, ?)',
+                    [(self.platform, scope, query, str(row[self._id_index])) for row in rows]
+                )
+
+            self._conn.commit()
+
+    def load(self, scope=None, query=None, since=None):
+        """
+        Загрузить записи корпуса
+
+        Args:
+            scope, query: только записи этого запроса
+            since: только записи с created_utc >= since (unix timestamp)
+
+        Returns:
+            PostStore
+        """
+        sql = 'SELECT p.row FROM corpus_posts p'
+        params = []
+
+        if scope is not None and query is not None:
+            sql += (' JOIN corpus_query_posts q ON q.platform = p.platform AND q.id = p.id'
+                    ' AND q.scope = ? AND q.query = ?')
+            params.extend([scope, query])
+
+        sql += ' WHERE p.platform = ?'
+        params.append(self.platform)
+
+        if since is not None:
+            sql += ' AND p.created_utc >= ?'
+            params.append(since)
+
+        sql += ' ORDER BY p.created_utc DESC'
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        # Записи, сохраненные до расширения схемы, дополняются None до ее длины
+        padding = (None,) * len(self.schema)
+        store = PostStore(self.schema)
+        store.extend((tuple(json.loads(row)) + padding)[:len(self.schema)] for (row,) in rows)
+        return store
+
+    def ids_since(self, since, scope=None, query=None):
+        """
+        id записей с created_utc >= since (например, для обновления метрик)
+        """
+        sql = 'SELECT p.id FROM corpus_posts p'
+        params = []
+
+        if scope is not None and query is not None:
+            sql += (' JOIN corpus_query_posts q ON q.platform = p.platform AND q.id = p.id'
+                    ' AND q.scope = ? AND q.query = ?')
+            params.extend([scope, query])
+
+        sql += ' WHERE p.platform = ? AND p.created_utc >= ?'
+        params.extend([self.platform, since])
+
+        with self._lock:
+            return [row_id for (row_id,) in self._conn.execute(sql, params).fetchall()]
+
+    def prune(self, before):
+        """
+        Удалить записи с created_utc < before (вышедшие из окна анализа)
+        """
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM corpus_query_posts WHERE platform = ? AND id IN '
+                '(SELECT id FROM corpus_posts WHERE platform = ? AND created_utc < ?)',
+                (self.platform, self.platform, before)
+            )
+            self._conn.execute(
+                'DELETE FROM corpus_posts WHERE platform = ? AND created_utc < ?',
+                (self.platform, before)
+            )
+            self._conn.commit()
+
+
+def create_corpus(platform='reddit', schema=REDDIT_POST_SCHEMA, **kwargs):
+    """
+    Создать корпус по переменной окружения CORPUS_PATH
+
+    Returns:
+        PostCorpus или None, если CORPUS_PATH не задан (инкрементальный режим выключен)
+    """
+    path = os.getenv('CORPUS_PATH')
+    if not path:
+        return None
+
+    return PostCorpus(path, platform=platform, schema=schema, **kwargs)
@@ -0,0 +1,275 @@
+"""
+Колоночное типизированное хранилище постов
+
+Scrapers добавляют записи кортежами, но хранилище сразу раскладывает их по
+типизированным буферам колонок (array.array): метрики - int32/int64,
+timestamps - float64, повторяющиеся строки (subreddit, lang, author) - коды
+категорий int32 со словарем значений. Кортеж и упакованные Python числа на
+каждую запись не живут до конца сбора, поэтому пиковая память меньше. В
+DataFrame буферы превращаются без копирования через Python объекты:
+numpy.frombuffer для чисел, Categorical.from_codes для категорий.
+"""
+
+from array import array
+
+import numpy as np
+import pandas as pd
+
+# Типы колонок:
+#   'str' - текст (object), 'category' - повторяющиеся строки,
+#   'int32' / 'int64' / 'float32' / 'float64' / 'bool' - numpy типы,
+#   'timestamp' - unix timestamp в секундах, 'timestamp_ms' - в миллисекундах
+REDDIT_POST_SCHEMA = [
+    ('id', 'str'),
+    ('subreddit', 'category'),
+    ('title', 'str'),
+    ('text', 'str'),
+    ('author', 'category'),
+    ('created_utc', 'timestamp'),
+    ('score', 'int32'),
+    ('upvote_ratio', 'float32'),
+    ('num_comments', 'int32'),
+    ('url', 'str'),
+    ('is_self', 'bool'),
+    ('link_flair_text', 'category'),
+    ('link_url', 'str'),
+]
+
+REDDIT_COMMENT_SCHEMA = [
+    ('comment_id', 'str'),
+    ('author', 'category'),
+    ('text', 'str'),
+    ('score', 'int32'),
+    ('created_utc', 'timestamp'),
+]
+
+TWEET_SCHEMA = [
+    ('id', 'int64'),
+    ('text', 'str'),
+    ('created_at', 'timestamp'),
+    ('lang', 'category'),
+    ('likes', 'int32'),
+    ('retweets', 'int32'),
+    ('replies', 'int32'),
+    ('impressions', 'int64'),
+    ('author_username', 'category'),
+    ('author_name', 'category'),
+    ('author_followers', 'int32'),
+    ('expanded_urls', 'str'),
+]
+
+USER_TWEET_SCHEMA = [
+    ('text', 'str'),
+    ('created_at', 'timestamp'),
+    ('likes', 'int32'),
+    ('retweets', 'int32'),
+    ('replies', 'int32'),
+]
+
+LINKEDIN_UPDATE_SCHEMA = [
+    ('urn', 'str'),
+    ('text', 'str'),
+    ('created_at', 'timestamp_ms'),
+    ('likes', 'int32'),
+    ('comments', 'int32'),
+    ('shares', 'int32'),
+]
+
+
+# Тип колонки -> typecode array.array (строки хранятся списком, категории - кодами 'i');
+# float32 копится в double, чтобы rows() возвращал исходные значения без округления
+_TYPECODES = {
+    'int32': 'i',
+    'int64': 'q',
+    'float32': 'd',
+    'float64': 'd',
+    'bool': 'b',
+    'timestamp': 'd',
+    'timestamp_ms': 'd',
+    'category': 'i',
+}
+
+# Колонки, где None хранится как NaN (как при np.asarray(..., dtype=float))
+_FLOAT_KINDS = ('float32', 'float64', 'timestamp', 'timestamp_ms')
+
+
+def _to_series(buffer, kind, categories=None):
+    if kind == 'category':
+        values = np.array(list(categories), dtype=object)
+        codes = np.frombuffer(buffer, dtype=np.int32) if len(buffer) else np.empty(0, dtype=np.int32)
+        try:
+            # Категории в отсортированном порядке, как у pd.Categorical(values)
+            order = np.argsort(values, kind='stable')
+        except TypeError:
+            order = np.arange(len(values))
+        remap = np.empty(len(values) + 1, dtype=np.int32)
+        remap[order] = np.arange(len(values), dtype=np.int32)
+        remap[-1] = -1
+        return pd.Categorical.from_codes(remap[codes], values[order])
+
+    if kind == 'str':
+        return np.asarray(buffer, dtype=object)
+
+    values = np.frombuffer(buffer, dtype=np.dtype(buffer.typecode)) if len(buffer) else np.empty(0)
+
+    if kind == 'timestamp':
+        return pd.to_datetime(values.astype('float64'), unit='s')
+
+    if kind == 'timestamp_ms':
+        return pd.to_datetime(values.astype('float64'), unit='ms')
+
+    return values.astype(kind)
+
+
+class PostStore:
+    """
+    Append-only колоночное хранилище записей по схеме
+
+    Пример:
+        store = PostStore(REDDIT_POST_SCHEMA)
+        store.append((post.id, str(post.subreddit), ...))
+        posts_df = store.to_frame()
+    """
+
+    def __init__(self, schema):
+        self.schema = list(schema)
+        self.columns = [name for name, _ in self.schema]
+        self._length = 0
+        self._buffers = [
+            [] if kind == 'str' else array(_TYPECODES[kind]) for _, kind in self.schema
+        ]
+        # Для category колонок: значение -> код (порядок первого появления)
+        self._categories = [{} if kind == 'category' else None for _, kind in self.schema]
+        self._appenders = [self._appender(index) for index in range(len(self.schema))]
+
+    def __len__(self):
+        return self._length
+
+    def _encode(self, index, values):
+        categories = self._categories[index]
+        if categories is not None:
+            # None и NaN - пропуск (код -1), как в pd.Categorical
+            return [
+                -1 if value is None or value != value else categories.setdefault(value, len(categories))
+                for value in values
+            ]
+
+        if self.schema[index][1] in _FLOAT_KINDS:
+            return [np.nan if value is None else value for value in values]
+
+        return values
+
+    def _appender(self, index):
+        """
+        Функция добавления одного значения в буфер колонки (без промежуточных списков)
+        """
+        buffer = self._buffers[index]
+        categories = self._categories[index]
+
+        if categories is not None:
+            return lambda value: buffer.append(
+                -1 if value is None or value != value else categories.setdefault(value, len(categories))
+            )
+
+        if self.schema[index][1] in _FLOAT_KINDS:
+            return lambda value: buffer.append(np.nan if value is None else value)
+
+        return buffer.append
+
+    def append(self, row):
+        """
+        Добавить запись - кортеж значений в порядке схемы
+        """
+        for append, value in zip(self._appenders, row):
+            append(value)
+        self._length += 1
+
+    def extend(self, rows):
+        """
+        Добавить несколько записей
+        """
+        rows = list(rows)
+        if not rows:
+            return
+
+        for index, values in enumerate(zip(*rows)):
+            self._buffers[index].extend(self._encode(index, values))
+        self._length += len(rows)
+
+    def _column_values(self, index):
+        """
+        Значения колонки как Python список (категории - исходные значения)
+        """
+        buffer = self._buffers[index]
+        kind = self.schema[index][1]
+
+        if kind == 'category':
+            values = list(self._categories[index]) + [None]
+            return [values[code] for code in buffer]
+
+        if kind == 'bool':
+            return [bool(value) for value in buffer]
+
+        if kind in _FLOAT_KINDS:
+            return [None if value != value else value for value in buffer]
+
+        return list(buffer)
+
+    def rows(self):
+        """
+        Записи как список кортежей в порядке схемы
+        """
+        if not self._length:
+            return []
+
+        return list(zip(*(self._column_values(index) for index in range(len(self.schema)))))
+
+    def to_columns(self):
+        """
+        Колонки как списки (JSON-сериализуемо, для кэша)
+        """
+        return {name: self._column_values(index) for index, name in enumerate(self.columns)}
+
+    @classmethod
+    def from_columns(cls, schema, columns):
+        """
+        Восстановить хранилище из to_columns()
+        """
+        store = cls(schema)
+        # Колонки, добавленные в схему позже записи кэша, заполняются None
+        length = len(next(iter(columns.values()), []))
+        store.extend(zip(*(columns.get(name, [None] * length) for name in store.columns)))
+        return store
+
+    def to_frame(self):
+        """
+        Типизированный DataFrame: одна конвертация на колонку
+        """
+        return pd.DataFrame({
+            name: _to_series(buffer, kind, categories)
+            for (name, kind), buffer, categories in zip(self.schema, self._buffers, self._categories)
+        })
+
+
+def concat_frames(frames, **kwargs):
+    """
+    pd.concat с сохранением category колонок
+
+    pd.concat превращает category с разными категориями в object, поэтому
+    такие колонки приводятся обратно к category после объединения
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    categorical = {
+        column for frame in frames
+        for column, dtype in frame.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)
+    }
+
+    combined = pd.concat(frames, **kwargs)
+    for column in categorical:
+        if column in combined and not isinstance(combined[column].dtype, pd.CategoricalDtype):
+            combined[column] = combined[column].astype('category')
+
+    return combined
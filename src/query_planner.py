@@ -0,0 +1,141 @@
+"""
+Планировщик поисковых запросов
+
+Упаковывает ключевые слова в минимальное число boolean OR запросов в пределах
+лимита длины запроса платформы, а затем атрибутирует найденные посты обратно
+к ключевым словам на нашей стороне.
+"""
+
+import re
+from collections import namedtuple
+
+# Reddit отбрасывает поисковые запросы длиннее 512 символов
+REDDIT_MAX_QUERY_LENGTH = 512
+
+# Лимит длины запроса Twitter API v2 recent search (Basic/Pro)
+TWITTER_MAX_QUERY_LENGTH = 512
+
+QueryGroup = namedtuple('QueryGroup', ['query', 'keywords'])
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def format_operand(keyword):
+    """
+    Ключевое слово как операнд OR
+
+    Многословные ключевые слова берутся в скобки, чтобы сохранить AND между словами
+    """
+    keyword = keyword.strip()
+
+    if ' ' in keyword and not (keyword.startswith('"') and keyword.endswith('"')):
+        return f'({keyword})'
+
+    return keyword
+
+
+def pack_keywords(keywords, max_length=REDDIT_MAX_QUERY_LENGTH, template='{}'):
+    """
+    Упаковать ключевые слова в минимальное число OR запросов
+
+    Жадная упаковка в исходном порядке: ключевое слово добавляется в текущий
+    запрос, пока запрос укладывается в max_length.
+
+    Args:
+        keywords: список ключевых слов
+        max_length: лимит длины запроса платформы
+        template: шаблон запроса, {} заменяется на OR группу
+
+    Returns:
+        список QueryGroup(query, keywords)
+    """
+    groups = []
+    operands = []
+    group_keywords = []
+
+    def build(parts):
+        return template.format(' OR '.join(parts))
+
+    for keyword in dict.fromkeys(k.strip() for k in keywords if k and k.strip()):
+        operand = format_operand(keyword)
+
+        if operands and len(build(operands + [operand])) > max_length:
+            groups.append(QueryGroup(build(operands), group_keywords))
+            operands, group_keywords = [], []
+
+        # Ключевое слово длиннее лимита всё равно уходит отдельным запросом
+        operands.append(operand)
+        group_keywords.append(keyword)
+
+    if operands:
+        groups.append(QueryGroup(build(operands), group_keywords))
+
+    return groups
+
+
+def or_group(terms):
+    """
+    OR группа фиксированного лексикона: многословные термины - фразами в кавычках
+    """
+    return '(' + ' OR '.join(f'"{term}"' if ' ' in term else term for term in terms) + ')'
+
+
+def single_keyword_groups(keywords):
+    """
+    По одному запросу на ключевое слово (без упаковки)
+    """
+    return [QueryGroup(keyword, [keyword]) for keyword in dict.fromkeys(keywords)]
+
+
+def _keyword_matcher(keyword):
+    """
+    Предикат для ключевого слова: фраза в кавычках - подстрока, иначе все слова
+    """
+    keyword = keyword.strip().lower()
+
+    if keyword.startswith('"') and keyword.endswith('"'):
+        phrase = keyword.strip('"')
+        return lambda text, tokens: phrase in text
+
+    terms = set(_TOKEN_RE.findall(keyword))
+    return lambda text, tokens: terms <= tokens
+
+
+def match_keywords(text, keywords):
+    """
+    Список ключевых слов, которым соответствует текст
+
+    Повторяет семантику поиска платформы: все слова ключевого слова должны
+    встречаться в тексте, фраза в кавычках - целиком
+    """
+    text = (text or '').lower()
+    tokens = set(_TOKEN_RE.findall(text))
+
+    return [keyword for keyword in keywords if _keyword_matcher(keyword)(text, tokens)]
+
+
+def attribute_keywords(texts, keywords):
+    """
+    Атрибутировать тексты, найденные упакованным запросом, к ключевым словам
+
+    Если ни одно ключевое слово не совпало локально (стемминг на стороне
+    платформы), текст относится ко всем ключевым словам группы - платформа
+    вернула его хотя бы для одного из них.
+
+    Args:
+        texts: итерируемое текстов (например, title + text поста)
+        keywords: ключевые слова упакованного запроса
+
+    Returns:
+        список списков ключевых слов в порядке texts
+    """
+    matchers = [(keyword, _keyword_matcher(keyword)) for keyword in keywords]
+    attributed = []
+
+    for text in texts:
+        text = (text or '').lower()
+        tokens = set(_TOKEN_RE.findall(text))
+        matched = [keyword for keyword, matcher in matchers if matcher(text, tokens)]
+        attributed.append(matched or list(keywords))
+
+    return attributed
@@ -0,0 +1,319 @@
+"""
+Адаптивный rate limiter для всех scrapers
+
+Token bucket, который синхронизируется с заголовками квоты платформ
+(Reddit X-Ratelimit-*, Twitter x-rate-limit-*) и планирует следующий запрос
+ровно на момент, когда у платформы появится бюджет.
+
+Состояние bucket хранится в backend:
+- MemoryBackend - общий для всех потоков процесса (по умолчанию)
+- FileLockBackend - общий для процессов на одной машине (fcntl lock)
+- RedisBackend - общий для Celery workers на разных машинах
+
+Backend выбирается переменной окружения RATE_LIMIT_BACKEND (memory/file/redis)
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: file lock backend недоступен
+    fcntl = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class MemoryBackend:
+    """
+    Хранение состояния в памяти процесса (общее для всех потоков)
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._states = {}
+
+    @contextmanager
+    def locked(self, name):
+        with self._lock:
+            yield
+
+    def load(self, name):
+        state = self._states.get(name)
+        return dict(state) if state else None
+
+    def save(self, name, state):
+        self._states[name] = dict(state)
+
+
+class FileLockBackend:
+    """
+    Хранение состояния в JSON файле под exclusive flock
+
+    Подходит для нескольких worker процессов на одной машине
+    """
+
+    def __init__(self, directory):
+        if fcntl is None:
+            raise RuntimeError("FileLockBackend требует fcntl (Linux/macOS)")
+
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        safe_name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+        return os.path.join(self.directory, f'{safe_name}.ratelimit.json')
+
+    @contextmanager
+    def locked(self, name):
+        with open(self._path(name) + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, name):
+        try:
+            with open(self._path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, name, state):
+        path = self._path(name)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+
+class RedisBackend:
+    """
+    Хранение состояния в Redis под распределенным lock
+
+    Подходит для Celery workers на разных машинах
+    """
+
+    def __init__(self, url, lock_timeout=10):
+        if redis is None:
+            raise ImportError("Для RedisBackend установите пакет redis: pip install redis")
+
+        self.client = redis.Redis.from_url(url)
+        self.lock_timeout = lock_timeout
+
+    @contextmanager
+    def locked(self, name):
+        with self.client.lock(f'ratelimit:{name}:lock', timeout=self.lock_timeout):
+            yield
+
+    def load(self, name):
+        raw = self.client.get(f'ratelimit:{name}')
+        return json.loads(raw) if raw else None
+
+    def save(self, name, state):
+        # Состояние без обращений устаревает само - bucket за это время всё равно полный
+        self.client.set(f'ratelimit:{name}', json.dumps(state), ex=3600)
+
+
+def parse_rate_limit_headers(headers):
+    """
+    Извлечь остаток квоты и момент сброса из заголовков ответа
+
+    Reddit: X-Ratelimit-Remaining, X-Ratelimit-Reset (секунд до сброса)
+    Twitter: x-rate-limit-remaining, x-rate-limit-reset (unix timestamp сброса)
+
+    Returns:
+        (remaining, reset_at) или None, если заголовков квоты нет
+    """
+    if not headers:
+        return None
+
+    headers = {key.lower(): value for key, value in headers.items()}
+    now = time.time()
+
+    try:
+        if 'x-ratelimit-remaining' in headers:
+            remaining = float(headers['x-ratelimit-remaining'])
+            reset_at = now + float(headers.get('x-ratelimit-reset', 0))
+            return remaining, reset_at
+
+        if 'x-rate-limit-remaining' in headers:
+            remaining = float(headers['x-rate-limit-remaining'])
+            reset_at = float(headers.get('x-rate-limit-reset', now))
+            return remaining, reset_at
+    except (TypeError, ValueError):
+        return None
+
+    return None
+
+
+class RateLimiter:
+    """
+    Token bucket с синхронизацией по заголовкам квоты
+
+    Пока платформа не прислала заголовки, bucket пополняется равномерно
+    (capacity запросов за period секунд). После ответа с заголовками остаток
+    bucket приводится к остатку квоты платформы, а пополнение откладывается
+    до момента сброса окна.
+    """
+
+    def __init__(self, name, capacity, period, backend=None):
+        """
+        Args:
+            name: имя bucket (общее для всех, кто делит квоту)
+            capacity: запросов в окне
+            period: длина окна в секундах
+            backend: MemoryBackend, FileLockBackend или RedisBackend
+        """
+        self.name = name
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.backend = backend or _shared_memory_backend
+
+    def _load_state(self, now):
+        state = self.backend.load(self.name)
+        if state is None:
+            state = {'tokens': float(self.capacity), 'updated': now, 'reset_at': None}
+
+        reset_at = state.get('reset_at')
+        if reset_at is not None:
+            # До сброса окна платформы бюджет определяется её заголовками
+            if now >= reset_at:
+                state['tokens'] = float(self.capacity)
+                state['reset_at'] = None
+        else:
+            elapsed = max(now - state['updated'], 0.0)
+            state['tokens'] = min(float(self.capacity), state['tokens'] + elapsed * self.rate)
+
+        state['updated'] = now
+        return state
+
+    def reserve(self):
+        """
+        Попытаться забрать токен
+
+        Returns:
+            0, если токен получен, иначе сколько секунд ждать до появления бюджета
+        """
+        wait = 0.0
+        with self.backend.locked(self.name):
+            now = time.time()
+            state = self._load_state(now)
+
+            if state['tokens'] >= 1:
+                state['tokens'] -= 1
+            elif state['reset_at'] is not None:
+                wait = max(state['reset_at'] - now, 0.01)
+            else:
+                wait = max((1 - state['tokens']) / self.rate, 0.01)
+
+            self.backend.save(self.name, state)
+
+        return wait
+
+    def acquire(self):
+        """
+        Дождаться бюджета и забрать токен
+        """
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def update_from_headers(self, headers):
+        """
+        Синхронизировать bucket с заголовками квоты из ответа платформы
+        """
+        quota = parse_rate_limit_headers(headers)
+        if quota is None:
+            return
+
+        remaining, reset_at = quota
+
+        with self.backend.locked(self.name):
+            now = time.time()
+            state = self._load_state(now)
+
+            previous_reset = state.get('reset_at')
+            if previous_reset is None or reset_at > previous_reset + 1:
+                # Новое окно квоты - доверяем платформе
+                state['tokens'] = remaining
+            else:
+                # То же окно: токены, уже выданные другим потокам, не возвращаем
+                state['tokens'] = min(state['tokens'], remaining)
+
+            state['reset_at'] = reset_at
+            self.backend.save(self.name, state)
+
+    def throttle(self, seconds):
+        """
+        Заблокировать bucket на seconds секунд (например, после 429)
+        """
+        with self.backend.locked(self.name):
+            now = time.time()
+            state = self._load_state(now)
+            state['tokens'] = 0.0
+            state['reset_at'] = max(state.get('reset_at') or 0, now + seconds)
+            self.backend.save(self.name, state)
+
+    def record_response(self, status_code, headers):
+        """
+        Учесть ответ платформы: заголовки квоты и 429 Too Many Requests
+        """
+        self.update_from_headers(headers)
+
+        if status_code == 429:
+            headers = {key.lower(): value for key, value in (headers or {}).items()}
+            try:
+                seconds = float(headers['retry-after'])
+            except (KeyError, TypeError, ValueError):
+                seconds = None
+
+            if seconds is not None:
+                self.throttle(seconds)
+            elif parse_rate_limit_headers(headers) is None:
+                self.throttle(self.period)
+
+
+_shared_memory_backend = MemoryBackend()
+
+
+def create_backend():
+    """
+    Создать backend по переменным окружения
+
+    RATE_LIMIT_BACKEND: memory (по умолчанию), file или redis
+    RATE_LIMIT_DIR: директория для file backend
+    RATE_LIMIT_REDIS_URL / REDIS_URL: адрес Redis для redis backend
+    """
+    backend_name = os.getenv('RATE_LIMIT_BACKEND', 'memory').lower()
+
+    if backend_name == 'redis':
+        url = os.getenv('RATE_LIMIT_REDIS_URL') or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        return RedisBackend(url)
+
+    if backend_name == 'file':
+        directory = os.getenv('RATE_LIMIT_DIR', os.path.join(tempfile.gettempdir(), 'saas_validator_ratelimits'))
+        return FileLockBackend(directory)
+
+    return _shared_memory_backend
+
+
+def create_rate_limiter(name, capacity, period):
+    """
+    Создать RateLimiter с backend из переменных окружения
+
+    Все limiters с одинаковым name делят одну квоту
+    """
+    return RateLimiter(name, capacity, period, backend=create_backend())
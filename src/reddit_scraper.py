@@ -5,16 +5,96 @@ Reddit Scraper для валидации SaaS идей
 """
 
 import praw
+import prawcore
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import json
 import re
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import time
 
+from .cache import create_cache
+from .cooccurrence import CooccurrenceMatrix
+from .entities import add_entities
+from .inverted_index import InvertedIndex
+from .near_duplicates import collapse_near_duplicates
+from .pain_scoring import PainSignalScorer
+from .phrase_mining import PhraseMiner
+from .post_corpus import create_corpus
+from .post_store import PostStore, REDDIT_COMMENT_SCHEMA, REDDIT_POST_SCHEMA, concat_frames
+from .query_planner import attribute_keywords, match_keywords, pack_keywords, single_keyword_groups
+from .rate_limiter import create_rate_limiter
+from .sentiment import SentimentAnalyzer
+from .sharded_analysis import ShardedAnalyzer, register_analyzer
+from .text_matching import KeywordMatcher
+
+
+class RateLimitedRequestor(prawcore.Requestor):
+    """
+    prawcore Requestor, пропускающий каждый HTTP запрос через общий RateLimiter
+    """
+    
+    def __init__(self, *args, rate_limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter
+    
+    def request(self, *args, **kwargs):
+        self.rate_limiter.acquire()
+        response = super().request(*args, **kwargs)
+        self.rate_limiter.record_response(response.status_code, response.headers)
+        return response
+
 
 class RedditSaaSValidator:
-    def __init__(self, client_id, client_secret, user_agent):
+    # TTL кэша поиска (секунды) по time_filter: чем короче окно, тем быстрее устаревает выдача
+    SEARCH_CACHE_TTL = {
+        'hour': 10 * 60,
+        'day': 60 * 60,
+        'week': 6 * 60 * 60,
+        'month': 12 * 60 * 60,
+        'year': 24 * 60 * 60,
+        'all': 24 * 60 * 60,
+    }
+    
+    # Метаданные subreddit (подписчики) почти не меняются в течение дня
+    SUBREDDIT_INFO_TTL = 24 * 60 * 60
+    
+    # Лучшие комментарии поста за несколько часов меняются мало
+    COMMENTS_CACHE_TTL = 6 * 60 * 60
+    
+    # Маркеры проблем и фрустрации в тексте
+    PAIN_KEYWORDS = [
+        'struggling', 'frustrated', 'annoying', 'waste time', 'wasting time',
+        'difficult', 'problem', 'issue', 'broken', 'hate', 'terrible',
+        'wish', 'need', 'missing', 'slow', 'expensive', 'costly',
+        'complicated', 'confusing', 'sucks', 'awful', 'pain',
+        'nightmare', 'help', 'advice', 'how to', 'anyone know',
+        'recommend', 'alternative', 'better than', 'tired of'
+    ]
+    
+    # Картинки, видео и кросспосты ведут на сам Reddit - это не внешние сайты
+    PLATFORM_DOMAINS = ('reddit.com', 'old.reddit.com', 'redd.it', 'i.redd.it', 'v.redd.it', 'preview.redd.it')
+    
+    # Query, под которым в корпусе хранятся посты из потока (ingestion mode)
+    STREAM_QUERY = '*'
+    
+    # Поток считается живым, если heartbeat не старше (секунды)
+    STREAM_MAX_LAG = 15 * 60
+    
+    # Длина окна time_filter в днях (для инкрементального поиска)
+    TIME_FILTER_DAYS = {
+        'hour': 1 / 24,
+        'day': 1,
+        'week': 7,
+        'month': 30,
+        'year': 365,
+    }
+    
+    def __init__(self, client_id, client_secret, user_agent, rate_limiter=None, search_cache=None,
+                 corpus=None):
         """
         Инициализация Reddit API клиента
         
@@ -27,12 +107,28 @@ class RedditSaaSValidator:
             client_id: ID приложения (под "personal use script")
             client_secret: Secret приложения
             user_agent: Описание приложения (например, "SaaS Validator by u/yourname")
+            rate_limiter: общий RateLimiter (по умолчанию - квота Reddit OAuth 100 запросов/мин,
+                backend из RATE_LIMIT_BACKEND)
+            search_cache: кэш результатов поиска (по умолчанию - из CACHE_BACKEND)
+            corpus: PostCorpus для инкрементальной ревалидации (по умолчанию - из CORPUS_PATH)
         """
-        self.reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent
-        )
+        # Один limiter на все потоки: квота Reddit считается на OAuth клиента
+        self.rate_limiter = rate_limiter or create_rate_limiter('reddit', capacity=100, period=60)
+        
+        self._reddit_kwargs = {
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'user_agent': user_agent,
+            'requestor_class': RateLimitedRequestor,
+            'requestor_kwargs': {'rate_limiter': self.rate_limiter}
+        }
+        self._local = threading.local()
+        
+        self.search_cache = search_cache if search_cache is not None else create_cache('reddit_search')
+        self.corpus = corpus if corpus is not None else create_corpus('reddit')
+        self.subreddit_cache = create_cache('reddit_subreddit_info')
+        self.comments_cache = create_cache('reddit_comments')
+        self.sentiment_analyzer = SentimentAnalyzer()
         
         # Проверка подключения
         try:
@@ -41,21 +137,45 @@ class RedditSaaSValidator:
         except:
             print("✅ Reddit API подключен (anonymous mode)")
     
-    def search_subreddit(self, subreddit_name, query, limit=100, time_filter='month', sort='relevance'):
+    @property
+    def reddit(self):
+        """
+        Reddit API клиент текущего потока
+        
+        praw не потокобезопасен, поэтому каждый поток получает свой экземпляр
+        """
+        reddit = getattr(self._local, 'reddit', None)
+        if reddit is None:
+            reddit = praw.Reddit(**self._reddit_kwargs)
+            self._local.reddit = reddit
+        return reddit
+    
+    def search_subreddit(self, subreddit_name, query, limit=100, time_filter='month', sort='relevance',
+                         raise_errors=False):
         """
         Поиск постов в конкретном subreddit
         
         Args:
-            subreddit_name: название subreddit (без r/)
+            subreddit_name: название subreddit (без r/) или multireddit вида 'a+b+c'
             query: поисковый запрос
             limit: максимальное количество постов
             time_filter: 'hour', 'day', 'week', 'month', 'year', 'all'
             sort: 'relevance', 'hot', 'top', 'new', 'comments'
+            raise_errors: пробрасывать ошибки API вместо пустого DataFrame
             
         Returns:
             DataFrame с постами
         """
-        posts_data = []
+        cache_key = json.dumps([subreddit_name.lower(), query, time_filter, sort, limit])
+        
+        if self.search_cache is not None:
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                store = PostStore.from_columns(REDDIT_POST_SCHEMA, cached)
+                print(f"💾 r/{subreddit_name}: '{query}' - {len(store)} постов из кэша")
+                return self._posts_frame(store)
+        
+        store = PostStore(REDDIT_POST_SCHEMA)
         
         print(f"Поиск в r/{subreddit_name}: '{query}'")
         print(f"Период: {time_filter}, Сортировка: {sort}")
@@ -71,35 +191,153 @@ class RedditSaaSValidator:
                 sort=sort
             )
             
+            store.extend(self._post_row(post) for post in search_results)
+            
+            print(f"✅ Найдено {len(store)} постов в r/{subreddit_name}")
+            
+        except Exception as e:
+            print(f"❌ Ошибка в r/{subreddit_name}: {e}")
+            if raise_errors:
+                raise
+            return pd.DataFrame()
+        
+        if self.search_cache is not None:
+            self.search_cache.set(
+                cache_key, store.to_columns(), ttl=self.SEARCH_CACHE_TTL.get(time_filter, 60 * 60)
+            )
+        
+        return self._posts_frame(store)
+    
+    @staticmethod
+    def _post_row(post):
+        """
+        Запись поста в порядке REDDIT_POST_SCHEMA
+        """
+        return (
+            post.id,
+            str(post.subreddit),
+            post.title,
+            post.selftext,
+            str(post.author) if post.author else '[deleted]',
+            post.created_utc,
+            post.score,
+            post.upvote_ratio,
+            post.num_comments,
+            f"https://reddit.com{post.permalink}",
+            post.is_self,
+            post.link_flair_text,
+            '' if post.is_self else post.url,
+        )
+    
+    @staticmethod
+    def _posts_frame(store):
+        """
+        Типизированный DataFrame постов с метрикой engagement
+        """
+        posts_df = store.to_frame()
+        posts_df['engagement'] = posts_df['score'] + posts_df['num_comments']  # Простая метрика engagement
+        return posts_df
+    
+    def search_subreddit_incremental(self, subreddit_name, query, corpus, window_days=30, refresh_days=3,
+                                     limit=250, raise_errors=False):
+        """
+        Инкрементальный поиск с checkpoint'ом по (subreddit, query)
+        
+        Первый запуск собирает окно window_days (sort='new'). Повторные запуски
+        докачивают только посты новее checkpoint'а, обновляют score и число
+        комментариев у постов за последние refresh_days и возвращают
+        объединенный корпус окна.
+        
+        Args:
+            subreddit_name: название subreddit или multireddit 'a+b+c'
+            query: поисковый запрос
+            corpus: PostCorpus
+            window_days: окно анализа в днях
+            refresh_days: за сколько последних дней обновлять метрики постов
+            limit: максимум новых постов за один запуск
+            raise_errors: пробрасывать ошибки API вместо пустого DataFrame
+            
+        Returns:
+            DataFrame с постами окна
+        """
+        scope = subreddit_name.lower()
+        now = time.time()
+        window_start = now - window_days * 24 * 60 * 60
+        checkpoint = corpus.get_checkpoint(scope, query)
+        
+        if checkpoint:
+            newest_created, newest_id = checkpoint
+        else:
+            newest_created, newest_id = window_start, None
+        
+        # Самый короткий time_filter, покрывающий промежуток с последнего checkpoint'а
+        gap_days = (now - newest_created) / (24 * 60 * 60)
+        time_filter = next(
+            (name for name, days in self.TIME_FILTER_DAYS.items() if days >= gap_days), 'all'
+        )
+        
+        new_store = PostStore(REDDIT_POST_SCHEMA)
+        
+        try:
+            search_results = self.reddit.subreddit(subreddit_name).search(
+                query=query,
+                sort='new',
+                time_filter=time_filter,
+                limit=limit
+            )
+            
+            # Выдача отсортирована от новых к старым: останавливаемся на checkpoint'е
+            scanned = 0
+            reached_checkpoint = False
             for post in search_results:
-                # Собираем данные о посте
-                post_info = {
-                    'id': post.id,
-                    'subreddit': str(post.subreddit),
-                    'title': post.title,
-                    'text': post.selftext,
-                    'author': str(post.author) if post.author else '[deleted]',
-                    'created_utc': datetime.fromtimestamp(post.created_utc),
-                    'score': post.score,
-                    'upvote_ratio': post.upvote_ratio,
-                    'num_comments': post.num_comments,
-                    'url': f"https://reddit.com{post.permalink}",
-                    'is_self': post.is_self,
-                    'link_flair_text': post.link_flair_text,
-                    'engagement': post.score + post.num_comments,  # Простая метрика engagement
-                }
-                
-                posts_data.append(post_info)
+                scanned += 1
+                if post.id == newest_id or post.created_utc < newest_created:
+                    reached_checkpoint = True
+                    break
+                new_store.append(self._post_row(post))
             
-            print(f"✅ Найдено {len(posts_data)} постов в r/{subreddit_name}")
+            # Выдача закончилась раньше limit - до checkpoint'а ничего не пропущено
+            complete = reached_checkpoint or limit is None or scanned < limit
+            
+            new_rows = new_store.rows()
+            new_ids = {row[0] for row in new_rows}
+            refresh_ids = [
+                post_id for post_id in corpus.ids_since(now - refresh_days * 24 * 60 * 60, scope, query)
+                if post_id not in new_ids
+            ]
+            refreshed = [
+                self._post_row(post)
+                for post in self.reddit.info(fullnames=[f't3_{post_id}' for post_id in refresh_ids])
+            ] if refresh_ids else []
             
         except Exception as e:
             print(f"❌ Ошибка в r/{subreddit_name}: {e}")
+            if raise_errors:
+                raise
             return pd.DataFrame()
         
-        return pd.DataFrame(posts_data)
+        corpus.add_rows(new_rows, scope=scope, query=query)
+        corpus.add_rows(refreshed)
+        
+        # Если limit оборвал выдачу до checkpoint'а, между ними остались несобранные посты:
+        # checkpoint не двигаем, следующий запуск просканирует промежуток заново
+        created_index = new_store.columns.index('created_utc')
+        if not complete:
+            print(f"⚠️ r/{subreddit_name}: '{query}' - больше {limit} новых постов, "
+                  f"checkpoint не сдвинут")
+        elif new_rows:
+            newest = max(new_rows, key=lambda row: row[created_index])
+            corpus.save_checkpoint(scope, query, newest[created_index], newest[0])
+        elif not checkpoint:
+            corpus.save_checkpoint(scope, query, window_start, '')
+        
+        print(f"🔁 r/{subreddit_name}: '{query}' - {len(new_rows)} новых постов, "
+              f"{len(refreshed)} обновлено")
+        
+        return self._posts_frame(corpus.load(scope, query, since=window_start))
     
-    def search_multiple_subreddits(self, subreddits, query, limit_per_subreddit=100, time_filter='month'):
+    def search_multiple_subreddits(self, subreddits, query, limit_per_subreddit=100, time_filter='month',
+                                   max_workers=1, multireddit_batch_size=None, corpus=None):
         """
         Поиск по нескольким subreddits
         
@@ -108,142 +346,472 @@ class RedditSaaSValidator:
             query: поисковый запрос
             limit_per_subreddit: лимит постов на каждый subreddit
             time_filter: временной фильтр
+            max_workers: количество параллельных потоков (1 - последовательный поиск).
+                Все потоки делят общий rate limiter клиента
+            multireddit_batch_size: если задан, subreddits объединяются в multireddit
+                'a+b+c' по столько штук и каждая группа ищется одним листингом
+            corpus: PostCorpus - докачивать только новые посты с последнего запуска
+                и возвращать объединенный корпус окна time_filter
         """
-        all_posts = []
-        
-        for subreddit in subreddits:
-            print(f"\n  Поиск в r/{subreddit}...")
-            posts_df = self.search_subreddit(
-                subreddit_name=subreddit,
+        def fetch(subreddit_name, limit, raise_errors=False):
+            if corpus is not None:
+                return self.search_subreddit_incremental(
+                    subreddit_name=subreddit_name,
+                    query=query,
+                    corpus=corpus,
+                    window_days=self.TIME_FILTER_DAYS.get(time_filter, 30),
+                    raise_errors=raise_errors
+                )
+            
+            return self.search_subreddit(
+                subreddit_name=subreddit_name,
                 query=query,
-                limit=limit_per_subreddit,
-                time_filter=time_filter
+                limit=limit,
+                time_filter=time_filter,
+                raise_errors=raise_errors
             )
+        
+        def search(subreddit):
+            print(f"\n  Поиск в r/{subreddit}...")
+            return fetch(subreddit, limit_per_subreddit)
+        
+        def search_batch(batch):
+            if len(batch) == 1:
+                return search(batch[0])
+            
+            multireddit = '+'.join(batch)
+            print(f"\n  Поиск в r/{multireddit}...")
+            
+            try:
+                # Листинг останавливается на неполной странице, так что общий лимит
+                # стоит запросов только при реально большой выдаче
+                posts_df = fetch(multireddit, limit_per_subreddit * len(batch), raise_errors=True)
+            except Exception:
+                print(f"⚠️ Multireddit недоступен, ищем по отдельности: r/{multireddit}")
+                return concat_frames([search(subreddit) for subreddit in batch], ignore_index=True)
+            
+            if posts_df.empty:
+                return posts_df
+            
+            # Восстанавливаем разбивку по subreddit и лимит на каждый из них
+            # (корпус окна при инкрементальном поиске не обрезаем)
+            if corpus is None:
+                subreddit_keys = posts_df['subreddit'].str.lower()
+                posts_df = posts_df[subreddit_keys.groupby(subreddit_keys).cumcount() < limit_per_subreddit]
             
-            if not posts_df.empty:
-                all_posts.append(posts_df)
+            for subreddit, count in posts_df['subreddit'].value_counts().items():
+                print(f"    r/{subreddit}: {count} постов")
             
-            # Задержка между запросами (rate limit)
-            time.sleep(2)
+            return posts_df
         
-        if not all_posts:
-            return pd.DataFrame()
+        if multireddit_batch_size and multireddit_batch_size > 1:
+            tasks = [
+                subreddits[i:i + multireddit_batch_size]
+                for i in range(0, len(subreddits), multireddit_batch_size)
+            ]
+            run = search_batch
+        else:
+            tasks = list(subreddits)
+            run = search
+        
+        if max_workers > 1 and len(tasks) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+                results = list(executor.map(run, tasks))
+        else:
+            results = [run(task) for task in tasks]
+        
+        combined = concat_frames(results, ignore_index=True)
         
-        combined = pd.concat(all_posts, ignore_index=True)
+        if combined.empty:
+            return combined
         
         # Удаляем дубликаты по ID
         combined = combined.drop_duplicates(subset=['id'])
         
         return combined
     
+    def ingest_submissions(self, subreddits=None, corpus=None, batch_size=100, flush_interval=30,
+                           backfill_limit=1000, refresh_days=3, refresh_interval=60 * 60, max_posts=None):
+        """
+        Непрерывное наполнение локального корпуса потоком новых постов
+        
+        Сначала для каждого subreddit докачивается /new (закрывает разрыв с
+        прошлого запуска), затем все subreddits читаются одним потоком
+        multireddit 'a+b+c'. Посты пишутся в корпус пачками, после каждой пачки
+        обновляется heartbeat покрытия - по нему validate_saas_idea решает,
+        можно ли ответить из корпуса без поиска через API.
+        
+        Args:
+            subreddits: список subreddits (по умолчанию - RedditAdvancedSearch.get_saas_subreddits)
+            corpus: PostCorpus (по умолчанию - из CORPUS_PATH)
+            batch_size: сколько постов копить до записи в корпус
+            flush_interval: максимальный интервал между записями (секунды)
+            backfill_limit: сколько постов /new докачивать при старте (максимум листинга - 1000)
+            refresh_days: за сколько последних дней обновлять score и число комментариев
+            refresh_interval: как часто обновлять метрики (секунды)
+            max_posts: остановиться после стольких постов из потока (None - работать до Ctrl+C)
+            
+        Returns:
+            dict со статистикой: posts_ingested, posts_refreshed
+        """
+        corpus = corpus if corpus is not None else self.corpus
+        if corpus is None:
+            raise ValueError("Для ingestion mode нужен корпус: задайте CORPUS_PATH или передайте corpus")
+        
+        if subreddits is None:
+            subreddits = [
+                subreddit
+                for group in RedditAdvancedSearch.get_saas_subreddits().values()
+                for subreddit in group
+            ]
+        
+        subreddits = list(dict.fromkeys(subreddits))
+        scopes = [subreddit.lower() for subreddit in subreddits]
+        stats = {'posts_ingested': 0, 'posts_refreshed': 0}
+        pending = []
+        
+        def flush():
+            rows_by_scope = {}
+            for scope, row in pending:
+                rows_by_scope.setdefault(scope, []).append(row)
+            
+            for scope, rows in rows_by_scope.items():
+                corpus.add_rows(rows, scope=scope, query=self.STREAM_QUERY)
+            
+            corpus.heartbeat(scopes)
+            stats['posts_ingested'] += len(pending)
+            pending.clear()
+        
+        print(f"📡 Ingestion: {len(subreddits)} subreddits -> {corpus.path}")
+        
+        try:
+            while True:
+                for subreddit in subreddits:
+                    self._backfill_subreddit(subreddit, corpus, limit=backfill_limit)
+                
+                last_flush = last_refresh = time.time()
+                
+                try:
+                    # pause_after=0: поток отдает None, когда новых постов нет,
+                    # чтобы пачка записывалась и без новых постов по таймеру
+                    stream = self.reddit.subreddit('+'.join(subreddits)).stream.submissions(pause_after=0)
+                    
+                    for post in stream:
+                        if post is not None:
+                            pending.append((str(post.subreddit).lower(), self._post_row(post)))
+                        
+                        now = time.time()
+                        if len(pending) >= batch_size or now - last_flush >= flush_interval:
+                            flush()
+                            last_flush = now
+                            print(f"  💾 Записано постов: {stats['posts_ingested']}")
+                        
+                        if now - last_refresh >= refresh_interval:
+                            stats['posts_refreshed'] += self._refresh_corpus_metrics(
+                                corpus, now - refresh_days * 24 * 60 * 60
+                            )
+                            last_refresh = now
+                        
+                        if max_posts and stats['posts_ingested'] + len(pending) >= max_posts:
+                            return stats
+                    
+                except (prawcore.exceptions.PrawcoreException, praw.exceptions.PRAWException) as e:
+                    # Разрыв потока: после паузы заново докачиваем /new и продолжаем
+                    print(f"⚠️ Поток прерван: {e}")
+                    flush()
+                    time.sleep(flush_interval)
+        
+        except KeyboardInterrupt:
+            print("\n⏹️ Ingestion остановлен")
+            return stats
+        
+        finally:
+            flush()
+    
+    def _backfill_subreddit(self, subreddit_name, corpus, limit=1000):
+        """
+        Докачать /new subreddit до последнего heartbeat и обновить покрытие
+        """
+        scope = subreddit_name.lower()
+        coverage = corpus.get_coverage(scope)
+        store = PostStore(REDDIT_POST_SCHEMA)
+        started = time.time()
+        
+        try:
+            for post in self.reddit.subreddit(subreddit_name).new(limit=limit):
+                store.append(self._post_row(post))
+                
+                # Дошли до уже покрытого промежутка - разрыва нет
+                if coverage and post.created_utc < coverage[1]:
+                    break
+                
+        except Exception as e:
+            print(f"❌ Ошибка в r/{subreddit_name}: {e}")
+            return
+        
+        rows = store.rows()
+        corpus.add_rows(rows, scope=scope, query=self.STREAM_QUERY)
+        
+        created_index = store.columns.index('created_utc')
+        if len(rows) < limit:
+            # Листинг не обрезан: корпус содержит всё с прошлого покрытия (или всю историю)
+            covered_from = coverage[0] if coverage else 0
+        else:
+            covered_from = min(row[created_index] for row in rows)
+        
+        corpus.save_coverage(scope, covered_from, heartbeat_at=started)
+        print(f"  r/{subreddit_name}: докачано {len(rows)} постов")
+    
+    def _refresh_corpus_metrics(self, corpus, since):
+        """
+        Обновить score и число комментариев у постов корпуса новее since
+        
+        Returns:
+            количество обновленных постов
+        """
+        post_ids = corpus.ids_since(since)
+        if not post_ids:
+            return 0
+        
+        try:
+            # praw запрашивает /api/info пачками по 100
+            rows = [
+                self._post_row(post)
+                for post in self.reddit.info(fullnames=[f't3_{post_id}' for post_id in post_ids])
+            ]
+        except Exception as e:
+            print(f"❌ Ошибка обновления метрик: {e}")
+            return 0
+        
+        corpus.add_rows(rows)
+        return len(rows)
+    
+    def covered_subreddits(self, subreddits, window_days=30):
+        """
+        Subreddits, которые непрерывно наполняются потоком на всё окно анализа
+        """
+        if self.corpus is None:
+            return []
+        
+        names = {subreddit.lower(): subreddit for subreddit in subreddits}
+        covered = self.corpus.covered_scopes(
+            names, since=time.time() - window_days * 24 * 60 * 60, max_lag=self.STREAM_MAX_LAG
+        )
+        return [names[scope] for scope in covered]
+    
+    def search_corpus(self, subreddits, keywords, window_days=30):
+        """
+        Поиск по локальному корпусу из потока вместо Reddit API
+        
+        Args:
+            subreddits: subreddits, покрытые потоком (см. covered_subreddits)
+            keywords: ключевые слова - пост подходит, если содержит все слова хотя бы одного
+            window_days: окно анализа в днях
+            
+        Returns:
+            DataFrame с постами и колонкой matched_keywords
+        """
+        since = time.time() - window_days * 24 * 60 * 60
+        store = PostStore(REDDIT_POST_SCHEMA)
+        
+        for subreddit in subreddits:
+            store.extend(self.corpus.load(subreddit.lower(), self.STREAM_QUERY, since=since).rows())
+        
+        posts_df = self._posts_frame(store)
+        if posts_df.empty:
+            return posts_df
+        
+        posts_df['matched_keywords'] = [
+            match_keywords(text, keywords) for text in posts_df['title'] + ' ' + posts_df['text']
+        ]
+        posts_df = posts_df[posts_df['matched_keywords'].str.len() > 0].reset_index(drop=True)
+        
+        print(f"  ⚡ Локальный корпус: {len(posts_df)} постов из {len(store)}")
+        
+        return posts_df
+    
     def get_top_posts(self, subreddit_name, time_filter='month', limit=50):
         """
         Получить топовые посты из subreddit
         
         Полезно для понимания текущих трендов и проблем
         """
-        posts_data = []
+        store = PostStore(REDDIT_POST_SCHEMA)
         
         print(f"Получение топ-постов из r/{subreddit_name} за {time_filter}")
         
         try:
             subreddit = self.reddit.subreddit(subreddit_name)
             
-            for post in subreddit.top(time_filter=time_filter, limit=limit):
-                post_info = {
-                    'id': post.id,
-                    'subreddit': str(post.subreddit),
-                    'title': post.title,
-                    'text': post.selftext,
-                    'author': str(post.author) if post.author else '[deleted]',
-                    'created_utc': datetime.fromtimestamp(post.created_utc),
-                    'score': post.score,
-                    'upvote_ratio': post.upvote_ratio,
-                    'num_comments': post.num_comments,
-                    'url': f"https://reddit.com{post.permalink}",
-                    'engagement': post.score + post.num_comments,
-                }
-                
-                posts_data.append(post_info)
+            store.extend(
+                self._post_row(post) for post in subreddit.top(time_filter=time_filter, limit=limit)
+            )
             
-            print(f"✅ Получено {len(posts_data)} топ-постов")
+            print(f"✅ Получено {len(store)} топ-постов")
             
         except Exception as e:
             print(f"❌ Ошибка: {e}")
             return pd.DataFrame()
         
-        return pd.DataFrame(posts_data)
+        return self._posts_frame(store)
     
-    def find_pain_points(self, posts_df):
+    @classmethod
+    def find_pain_points(cls, posts_df):
         """
         Анализ болевых точек в постах
         
-        Ищет посты с маркерами проблем и фрустрации
+        Ищет посты с маркерами проблем и фрустрации. Classmethod - может
+        выполняться в worker процессах ShardedAnalyzer без API клиента
         """
         if posts_df.empty:
             return pd.DataFrame()
         
-        pain_keywords = [
-            'struggling', 'frustrated', 'annoying', 'waste time', 'wasting time',
-            'difficult', 'problem', 'issue', 'broken', 'hate', 'terrible',
-            'wish', 'need', 'missing', 'slow', 'expensive', 'costly',
-            'complicated', 'confusing', 'sucks', 'awful', 'pain',
-            'nightmare', 'help', 'advice', 'how to', 'anyone know',
-            'recommend', 'alternative', 'better than', 'tired of'
-        ]
+        matcher = KeywordMatcher.for_keywords(cls.PAIN_KEYWORDS)
         
-        pain_posts = []
+        # Проверяем title и text: матрица постов × маркеров за один проход по колонке
+        hits = matcher.hit_matrix(posts_df['title'] + ' ' + posts_df['text'])
+        pain_rows = np.flatnonzero(np.diff(hits.indptr))
         
-        for _, post in posts_df.iterrows():
-            # Проверяем title и text
-            combined_text = f"{post['title']} {post['text']}".lower()
-            
-            matched_keywords = []
-            for keyword in pain_keywords:
-                if keyword in combined_text:
-                    matched_keywords.append(keyword)
-            
-            if matched_keywords:
-                pain_posts.append({
-                    'post_id': post['id'],
-                    'subreddit': post['subreddit'],
-                    'title': post['title'],
-                    'text': post['text'][:200] + '...' if len(post['text']) > 200 else post['text'],
-                    'keywords': ', '.join(matched_keywords),
-                    'engagement': post['engagement'],
-                    'score': post['score'],
-                    'num_comments': post['num_comments'],
-                    'url': post['url']
-                })
+        if len(pain_rows) == 0:
+            return pd.DataFrame()
+        
+        pain_df = posts_df.iloc[pain_rows].reset_index(drop=True)
+        
+        # Маркеры поста в порядке PAIN_KEYWORDS (индексы в строках CSR отсортированы)
+        keywords = np.array(matcher.keywords, dtype=object)
+        keywords_column = [
+            ', '.join(keywords[hits.indices[hits.indptr[row]:hits.indptr[row + 1]]])
+            for row in pain_rows
+        ]
+        
+        text = pain_df['text']
+        truncated = text.str.slice(0, 200) + '...'
         
-        return pd.DataFrame(pain_posts)
+        return pd.DataFrame({
+            'post_id': pain_df['id'],
+            'subreddit': pain_df['subreddit'],
+            'title': pain_df['title'],
+            'text': truncated.where(text.str.len() > 200, text),
+            'keywords': keywords_column,
+            'engagement': pain_df['engagement'],
+            'score': pain_df['score'],
+            'num_comments': pain_df['num_comments'],
+            'url': pain_df['url']
+        })
     
     def analyze_comments(self, post_id, limit=50):
         """
         Анализ комментариев к посту
         
-        Комментарии часто содержат детальное описание проблем
+        Комментарии часто содержат детальное описание проблем.
+        Дерево обходится лениво в ширину и обход останавливается на limit
+        комментариях, без replace_more и полного flatten дерева.
         """
-        comments_data = []
-        
         try:
-            submission = self.reddit.submission(id=post_id)
-            submission.comments.replace_more(limit=0)  # Не загружаем "load more comments"
-            
-            for comment in submission.comments.list()[:limit]:
-                if hasattr(comment, 'body'):
-                    comments_data.append({
-                        'comment_id': comment.id,
-                        'author': str(comment.author) if comment.author else '[deleted]',
-                        'text': comment.body,
-                        'score': comment.score,
-                        'created_utc': datetime.fromtimestamp(comment.created_utc),
-                    })
-            
+            return self._comment_store(post_id, limit).to_frame()
         except Exception as e:
             print(f"❌ Ошибка при получении комментариев: {e}")
+            return PostStore(REDDIT_COMMENT_SCHEMA).to_frame()
+    
+    def _comment_store(self, post_id, limit):
+        """
+        Комментарии поста в PostStore (ошибки API пробрасываются)
+        """
+        store = PostStore(REDDIT_COMMENT_SCHEMA)
+        
+        submission = self.reddit.submission(id=post_id)
+        # Просим у API только лучшие комментарии в пределах бюджета
+        submission.comment_sort = 'top'
+        submission.comment_limit = limit
+        
+        for comment in self._iter_comments_bfs(submission, limit):
+            store.append((
+                comment.id,
+                str(comment.author) if comment.author else '[deleted]',
+                comment.body,
+                comment.score,
+                comment.created_utc,
+            ))
         
-        return pd.DataFrame(comments_data)
+        return store
+    
+    @staticmethod
+    def _iter_comments_bfs(submission, limit):
+        """
+        Обход дерева комментариев в ширину до limit комментариев
+        
+        Узлы "load more comments" пропускаются - они стоят отдельных запросов
+        """
+        queue = deque(submission.comments)
+        count = 0
+        
+        while queue and count < limit:
+            comment = queue.popleft()
+            if isinstance(comment, praw.models.MoreComments):
+                continue
+            
+            yield comment
+            count += 1
+            queue.extend(comment.replies)
+    
+    def harvest_comments(self, pain_points_df, top_n=10, comments_per_post=50, max_workers=4):
+        """
+        Параллельный сбор комментариев к топ-N постам с болевыми точками
+        
+        Посты обрабатываются в пуле потоков, все запросы проходят через общий rate limiter.
+        Комментарии кэшируются по id поста на COMMENTS_CACHE_TTL - повторная валидация
+        не запрашивает деревья комментариев заново
+        
+        Args:
+            pain_points_df: результат find_pain_points
+            top_n: сколько постов с наибольшим engagement обработать
+            comments_per_post: бюджет комментариев на пост
+            max_workers: количество параллельных потоков
+            
+        Returns:
+            DataFrame с комментариями и колонкой post_id
+        """
+        if pain_points_df.empty or top_n <= 0:
+            return pd.DataFrame()
+        
+        post_ids = pain_points_df.nlargest(top_n, 'engagement')['post_id'].tolist()
+        cache_keys = {post_id: f'{post_id}:{comments_per_post}' for post_id in post_ids}
+        
+        cached = {}
+        if self.comments_cache is not None:
+            cached = self.comments_cache.get_many(list(cache_keys.values()))
+        
+        def fetch(post_id):
+            if cache_keys[post_id] in cached:
+                return PostStore.from_columns(REDDIT_COMMENT_SCHEMA, cached[cache_keys[post_id]])
+            
+            try:
+                return self._comment_store(post_id, comments_per_post)
+            except Exception as e:
+                # Ошибку не кэшируем - следующий запуск попробует снова
+                print(f"❌ Ошибка при получении комментариев: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(post_ids)))) as executor:
+            stores = dict(zip(post_ids, executor.map(fetch, post_ids)))
+        
+        if self.comments_cache is not None:
+            fetched = {
+                cache_keys[post_id]: store.to_columns()
+                for post_id, store in stores.items()
+                if store is not None and cache_keys[post_id] not in cached
+            }
+            self.comments_cache.set_many(fetched, ttl=self.COMMENTS_CACHE_TTL)
+        
+        results = []
+        for post_id, store in stores.items():
+            if store is None:
+                continue
+            comments_df = store.to_frame()
+            comments_df['post_id'] = post_id
+            results.append(comments_df)
+        
+        return concat_frames(results, ignore_index=True)
     
     def get_subreddit_info(self, subreddit_name):
         """
@@ -251,26 +819,79 @@ class RedditSaaSValidator:
         
         Полезно для оценки размера аудитории
         """
-        try:
-            subreddit = self.reddit.subreddit(subreddit_name)
+        return self.get_subreddits_info([subreddit_name]).get(subreddit_name)
+    
+    def get_subreddits_info(self, subreddit_names):
+        """
+        Информация о нескольких subreddits одним запросом к /api/info
+        
+        Результаты кэшируются на SUBREDDIT_INFO_TTL. Забаненные, приватные и
+        несуществующие subreddits кэшируются негативно и не запрашиваются повторно.
+        
+        Args:
+            subreddit_names: список названий subreddits
             
-            info = {
-                'name': subreddit.display_name,
-                'title': subreddit.title,
-                'description': subreddit.public_description,
-                'subscribers': subreddit.subscribers,
-                'active_users': subreddit.active_user_count,
-                'created_utc': datetime.fromtimestamp(subreddit.created_utc),
-                'url': f"https://reddit.com/r/{subreddit_name}"
-            }
+        Returns:
+            dict {название: info или None}
+        """
+        names = list(dict.fromkeys(subreddit_names))
+        cached = {}
+        
+        if self.subreddit_cache is not None:
+            cached = self.subreddit_cache.get_many([name.lower() for name in names])
+        
+        missing = [name for name in names if name.lower() not in cached]
+        
+        if missing:
+            fetched = {name.lower(): {'exists': False} for name in missing}
             
-            return info
+            try:
+                # praw сам разбивает список на запросы по 100 subreddits
+                for subreddit in self.reddit.info(subreddits=missing):
+                    # Только данные из ответа: обращение к отсутствующему полю вызвало бы отдельный запрос
+                    data = vars(subreddit)
+                    if data.get('subreddit_type') == 'private' or data.get('subscribers') is None:
+                        continue
+                    
+                    fetched[subreddit.display_name.lower()] = {
+                        'exists': True,
+                        'name': subreddit.display_name,
+                        'title': data.get('title'),
+                        'description': data.get('public_description'),
+                        'subscribers': data.get('subscribers') or 0,
+                        'active_users': data.get('active_user_count') or 0,
+                        'created_utc': data.get('created_utc'),
+                    }
+            except Exception as e:
+                print(f"❌ Ошибка: {e}")
+                # Ошибку API не кэшируем - в следующий раз попробуем снова
+                return {name: self._subreddit_info(name, cached.get(name.lower())) for name in names}
             
-        except Exception as e:
-            print(f"❌ Ошибка: {e}")
+            if self.subreddit_cache is not None:
+                self.subreddit_cache.set_many(fetched, ttl=self.SUBREDDIT_INFO_TTL)
+            
+            cached.update(fetched)
+        
+        return {name: self._subreddit_info(name, cached.get(name.lower())) for name in names}
+    
+    @staticmethod
+    def _subreddit_info(subreddit_name, entry):
+        if not entry or not entry.get('exists'):
             return None
+        
+        return {
+            'name': entry['name'],
+            'title': entry['title'],
+            'description': entry['description'],
+            'subscribers': entry['subscribers'],
+            'active_users': entry['active_users'],
+            'created_utc': datetime.fromtimestamp(entry['created_utc']) if entry['created_utc'] else None,
+            'url': f"https://reddit.com/r/{subreddit_name}"
+        }
     
-    def validate_saas_idea(self, idea_keywords, relevant_subreddits, output_file='reddit_validation.json'):
+    def validate_saas_idea(self, idea_keywords, relevant_subreddits, output_file='reddit_validation.json',
+                           max_workers=4, pack_queries=True, multireddit_batch_size=None, comments_top_n=10,
+                           analysis_workers=None, competitor_names=None):
         """
         Полная валидация SaaS идеи через Reddit
         
@@ -278,6 +899,15 @@ class RedditSaaSValidator:
             idea_keywords: список ключевых слов, связанных с идеей
             relevant_subreddits: список релевантных subreddits
             output_file: файл для сохранения результатов
+            max_workers: количество параллельных потоков поиска
+            pack_queries: упаковывать ключевые слова в OR запросы (меньше запросов к API)
+            multireddit_batch_size: сколько subreddits искать одним multireddit запросом
+                (None - по одному запросу на subreddit). Одна выдача поиска ограничена
+                несколькими сотнями постов на всю пачку, поэтому постов будет меньше,
+                чем при поиске по каждому subreddit, а пороги оценки рассчитаны на него
+            comments_top_n: для скольких постов с болевыми точками собирать комментарии (0 - не собирать)
+            analysis_workers: процессов для анализа больших корпусов (по умолчанию - число ядер)
+            competitor_names: названия конкурентов для лексиконов и co-occurrence
             
         Returns:
             dict с результатами валидации
@@ -295,62 +925,187 @@ class RedditSaaSValidator:
             'pain_points_found': 0,
             'top_posts': [],
             'pain_point_posts': [],
+            'comments_analyzed': 0,
+            'comment_pain_points_found': 0,
+            'top_pain_comments': [],
             'common_issues': {},
+            'posts_by_keyword': {},
             'potential_competitors': [],
             'market_size_estimate': 0
         }
         
         # 1. Анализ subreddits
         print("📊 Анализ subreddits:")
-        for subreddit in relevant_subreddits:
-            info = self.get_subreddit_info(subreddit)
+        subreddits_info = self.get_subreddits_info(relevant_subreddits)
+        for subreddit, info in subreddits_info.items():
             if info:
                 validation_results['subreddit_stats'].append(info)
                 validation_results['market_size_estimate'] += info['subscribers']
                 print(f"  r/{subreddit}: {info['subscribers']:,} подписчиков, {info['active_users']:,} активных")
+            else:
+                print(f"  r/{subreddit}: не найден, приватный или забанен")
         
         # 2. Поиск постов по ключевым словам
         print("\n🔍 Поиск релевантных постов:")
         all_posts = []
         
-        for keyword in idea_keywords:
-            print(f"\n  Ключевое слово: '{keyword}'")
+        # Несуществующие, приватные и забаненные не ищем: в multireddit запросе одно такое
+        # имя роняет весь запрос пачки
+        available_subreddits = [s for s in relevant_subreddits if subreddits_info.get(s)]
+        
+        # Subreddits из ingestion потока отвечаем из корпуса, остальные ищем через API
+        streamed_subreddits = self.covered_subreddits(available_subreddits)
+        validation_results['subreddits_from_corpus'] = streamed_subreddits
+        searched_subreddits = [s for s in available_subreddits if s not in streamed_subreddits]
+        
+        if streamed_subreddits:
+            posts = self.search_corpus(streamed_subreddits, idea_keywords)
+            if not posts.empty:
+                all_posts.append(posts)
+        
+        if not searched_subreddits:
+            query_groups = []
+        elif pack_queries:
+            query_groups = pack_keywords(idea_keywords)
+            print(f"  {len(idea_keywords)} ключевых слов упаковано в {len(query_groups)} OR запрос(ов)")
+        else:
+            query_groups = single_keyword_groups(idea_keywords)
+        
+        for group in query_groups:
+            print(f"\n  Запрос: {group.query}")
             posts = self.search_multiple_subreddits(
-                subreddits=relevant_subreddits,
-                query=keyword,
-                limit_per_subreddit=50,
-                time_filter='month'
+                subreddits=searched_subreddits,
+                query=group.query,
+                # Бюджет как у поиска по одному слову (50 на слово): praw листает по 100 постов,
+                # поэтому число запросов не больше, чем при отдельном запросе на каждое слово
+                limit_per_subreddit=50 * len(group.keywords),
+                time_filter='month',
+                max_workers=max_workers,
+                multireddit_batch_size=multireddit_batch_size,
+                corpus=self.corpus
             )
             if not posts.empty:
+                posts['matched_keywords'] = attribute_keywords(
+                    posts['title'] + ' ' + posts['text'], group.keywords
+                )
                 all_posts.append(posts)
-            time.sleep(1)
         
         if all_posts:
-            combined_posts = pd.concat(all_posts, ignore_index=True)
+            combined_posts = concat_frames(all_posts, ignore_index=True)
+            
+            # Пост мог прийти из нескольких запросов - объединяем его ключевые слова
+            matched_keywords = combined_posts.groupby('id', sort=False)['matched_keywords'].agg(
+                lambda lists: list(dict.fromkeys(keyword for keywords in lists for keyword in keywords))
+            )
             combined_posts = combined_posts.drop_duplicates(subset=['id'])
+            combined_posts['matched_keywords'] = combined_posts['id'].map(matched_keywords)
+            
+            # Кросспосты и повторные вопросы - один пост с суммарной реакцией
+            posts_before = len(combined_posts)
+            combined_posts = collapse_near_duplicates(
+                combined_posts,
+                sum_columns=['score', 'num_comments', 'engagement'],
+                list_columns=['matched_keywords']
+            )
+            validation_results['near_duplicates_collapsed'] = posts_before - len(combined_posts)
             validation_results['posts_found'] = len(combined_posts)
+            validation_results['posts_by_keyword'] = (
+                combined_posts['matched_keywords'].explode().value_counts().to_dict()
+            )
+            
+            # Все лексиконы считаются по одному индексу корпуса, без повторных проходов по текстам
+            corpus_index = InvertedIndex(combined_posts['title'] + ' ' + combined_posts['text'])
+            validation_results['lexicon_coverage'] = corpus_index.lexicon_counts(
+                RedditAdvancedSearch.get_lexicons(competitor_names)
+            )
+            
+            # Какие болевые маркеры встречаются вместе с ключевыми словами идеи и конкурентами;
+            # маркеры и их совпадение - те же, что у find_pain_points
+            cooccurrence = CooccurrenceMatrix.from_texts(combined_posts['title'] + ' ' + combined_posts['text'], {
+                'pain': self.PAIN_KEYWORDS,
+                'product': idea_keywords,
+                'competitor': competitor_names or [],
+            })
+            validation_results['keyword_cooccurrence'] = cooccurrence.report(
+                [('pain', 'product'), ('pain', 'competitor'), ('product', 'competitor')]
+            )
+            
+            # Домены ссылок в постах и целей link-постов - кандидаты в конкуренты
+            # (колонка url - ссылка на сам пост)
+            post_entities = add_entities(combined_posts, ('title', 'text', 'link_url'), types=['domains'])
+            for domain in self.PLATFORM_DOMAINS:
+                post_entities['domains'].pop(domain, None)
+            validation_results['top_domains'] = dict(post_entities['domains'].most_common(20))
             
             # 3. Анализ болевых точек
             print("\n🔥 Анализ болевых точек:")
-            pain_points = self.find_pain_points(combined_posts)
+            pain_points = ShardedAnalyzer(analysis_workers).run(
+                combined_posts, ['reddit_pain_points']
+            )['reddit_pain_points']
             validation_results['pain_points_found'] = len(pain_points)
             
+            # Sentiment постов (повторные тексты берутся из кэша)
+            self.sentiment_analyzer.add_sentiment(combined_posts, ('title', 'text'))
+            validation_results['avg_sentiment'] = round(float(combined_posts['sentiment'].mean()), 3)
+            
+            # Взвешенный болевой сигнал всех постов одним проходом
+            pain_scores = PainSignalScorer().score(combined_posts['title'], combined_posts['text'])
+            combined_posts['pain_score'] = pain_scores.scores
+            
             if not pain_points.empty:
-                # Топ постов с болевыми точками
-                top_pain = pain_points.nlargest(10, 'engagement')
+                # Топ постов с болевыми точками: сила сигнала × engagement
+                post_signals = combined_posts.set_index('id')
+                pain_points['pain_score'] = pain_points['post_id'].map(post_signals['pain_score']).to_numpy()
+                pain_points['sentiment'] = pain_points['post_id'].map(post_signals['sentiment']).to_numpy()
+                pain_points['pain_priority'] = pain_points['pain_score'] * pain_points['engagement']
+                top_pain = pain_points.nlargest(10, 'pain_priority')
                 validation_results['pain_point_posts'] = top_pain.to_dict('records')
+                validation_results['issue_scores'] = dict(
+                    sorted(pain_scores.term_scores.items(), key=lambda item: item[1], reverse=True)[:20]
+                )
                 
-                # Анализ частых проблем
+                # Частота маркеров болевых точек
                 all_keywords = []
                 for keywords_str in pain_points['keywords']:
                     all_keywords.extend(keywords_str.split(', '))
                 keyword_counter = Counter(all_keywords)
-                validation_results['common_issues'] = dict(keyword_counter.most_common(20))
+                validation_results['pain_keyword_counts'] = dict(keyword_counter.most_common(20))
+                
+                # Частые проблемы - фразы, характерные для болевых постов относительно всех найденных
+                post_texts = combined_posts['title'] + ' ' + combined_posts['text']
+                background = PhraseMiner(capacity=0).update(post_texts)
+                is_pain_post = combined_posts['id'].isin(pain_points['post_id']).to_numpy()
+                problem_phrases = PhraseMiner(min_count=2).update(post_texts[is_pain_post]).top_phrases(background)
+                validation_results['problem_phrases'] = problem_phrases
+                validation_results['common_issues'] = {item['phrase']: item['count'] for item in problem_phrases}
                 
                 print(f"  Найдено {len(pain_points)} постов с болевыми точками")
-                print(f"\n  Топ проблем:")
-                for issue, count in keyword_counter.most_common(10):
-                    print(f"    '{issue}': {count} упоминаний")
+                if problem_phrases:
+                    print(f"\n  Топ проблем:")
+                    for item in problem_phrases[:10]:
+                        print(f"    '{item['phrase']}': {item['count']} постов (lift {item['lift']})")
+                else:
+                    print(f"\n  Топ маркеров:")
+                    for issue, count in keyword_counter.most_common(10):
+                        print(f"    '{issue}': {count} упоминаний")
+                
+                # Комментарии к самым обсуждаемым постам с болевыми точками
+                comments = self.harvest_comments(pain_points, top_n=comments_top_n, max_workers=max_workers)
+                
+                if not comments.empty:
+                    self.sentiment_analyzer.add_sentiment(comments)
+                    matcher = KeywordMatcher.for_keywords(self.PAIN_KEYWORDS)
+                    pain_comments = comments[comments['text'].map(matcher.first).notna()]
+                    
+                    validation_results['comments_analyzed'] = len(comments)
+                    validation_results['comment_pain_points_found'] = len(pain_comments)
+                    validation_results['avg_comment_sentiment'] = round(float(comments['sentiment'].mean()), 3)
+                    validation_results['top_pain_comments'] = pain_comments.nlargest(10, 'score')[
+                        ['post_id', 'text', 'score', 'sentiment']
+                    ].to_dict('records')
+                    
+                    print(f"\n  Комментариев проанализировано: {len(comments)}, "
+                          f"с болевыми точками: {len(pain_comments)}")
             
             # 4. Топ посты по engagement
             top_posts = combined_posts.nlargest(10, 'engagement')
@@ -400,7 +1155,7 @@ class RedditSaaSValidator:
             
             # Свежесть проблемы (посты за последний месяц)
             recent_posts = combined_posts[
-                combined_posts['created_utc'] > datetime.now() - timedelta(days=30)
+                combined_posts['created_utc'] > datetime.utcnow() - timedelta(days=30)
             ]
             if len(recent_posts) > 20:
                 score += 10
@@ -425,6 +1180,9 @@ class RedditSaaSValidator:
             validation_results['verdict'] = "❌ НЕТ ДАННЫХ - Не найдено релевантных постов"
             validation_results['validation_score'] = 0
         
+        if self.search_cache is not None:
+            validation_results['search_cache_stats'] = self.search_cache.stats()
+        
         # Сохранение результатов
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(validation_results, f, indent=2, ensure_ascii=False, default=str)
@@ -440,6 +1198,17 @@ class RedditSaaSValidator:
         print(f"  - Найдено постов: {validation_results['posts_found']}")
         print(f"  - Болевых точек: {validation_results['pain_points_found']}")
         
+        if validation_results.get('near_duplicates_collapsed'):
+            print(f"  - Схлопнуто почти-дубликатов: {validation_results['near_duplicates_collapsed']}")
+        
+        if 'avg_sentiment' in validation_results:
+            print(f"  - Средний sentiment: {validation_results['avg_sentiment']:+.2f}")
+        
+        if 'search_cache_stats' in validation_results:
+            cache_stats = validation_results['search_cache_stats']
+            print(f"  - Кэш поиска: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                  f"(hit rate {cache_stats['hit_rate']:.0%})")
+        
         if 'score_reasons' in validation_results:
             print(f"\n💡 Почему эта оценка:")
             for reason in validation_results['score_reasons']:
@@ -450,11 +1219,33 @@ class RedditSaaSValidator:
         return validation_results
 
 
+register_analyzer(
+    'reddit_pain_points', RedditSaaSValidator.find_pain_points,
+    columns=['id', 'subreddit', 'title', 'text', 'engagement', 'score', 'num_comments', 'url']
+)
+
+
 class RedditAdvancedSearch:
     """
     Расширенные поисковые запросы и helper методы для Reddit
     """
     
+    # Лексиконы запросов - по ним же считается покрытие собранного корпуса (InvertedIndex)
+    PAIN_KEYWORDS = [
+        'struggling', 'frustrated', 'problem', 'issue',
+        'help', 'advice', 'how to', 'difficult'
+    ]
+    
+    SOLUTION_KEYWORDS = [
+        'recommend', 'best tool', 'looking for',
+        'need help', 'what do you use', 'alternative to'
+    ]
+    
+    WILLINGNESS_TO_PAY_KEYWORDS = [
+        'worth it', 'pricing', 'expensive', 'cheap',
+        'paying for', 'subscription', 'would pay'
+    ]
+    
     @staticmethod
     def get_saas_subreddits():
         """
@@ -469,6 +1260,23 @@ class RedditAdvancedSearch:
             'freelance': ['freelance', 'forhire', 'freelance_forhire']
         }
     
+    @staticmethod
+    def get_lexicons(competitors=None):
+        """
+        Лексиконы для анализа корпуса: pain, solution, willingness_to_pay, competitor
+        
+        Args:
+            competitors: названия конкурентов (лексикон competitor только если заданы)
+        """
+        lexicons = {
+            'pain': RedditAdvancedSearch.PAIN_KEYWORDS,
+            'solution': RedditAdvancedSearch.SOLUTION_KEYWORDS,
+            'willingness_to_pay': RedditAdvancedSearch.WILLINGNESS_TO_PAY_KEYWORDS,
+        }
+        if competitors:
+            lexicons['competitor'] = list(competitors)
+        return lexicons
+    
     @staticmethod
     def build_pain_query(topic):
         """
@@ -476,13 +1284,8 @@ class RedditAdvancedSearch:
         
         Reddit search поддерживает boolean операторы
         """
-        pain_keywords = [
-            'struggling', 'frustrated', 'problem', 'issue',
-            'help', 'advice', 'how to', 'difficult'
-        ]
-        
         # Комбинируем topic с pain keywords
-        queries = [f'"{topic}" "{keyword}"' for keyword in pain_keywords]
+        queries = [f'"{topic}" "{keyword}"' for keyword in RedditAdvancedSearch.PAIN_KEYWORDS]
         
         return queries
     
@@ -491,12 +1294,7 @@ class RedditAdvancedSearch:
         """
         Построить запрос для поиска запросов на решение
         """
-        solution_keywords = [
-            'recommend', 'best tool', 'looking for',
-            'need help', 'what do you use', 'alternative to'
-        ]
-        
-        queries = [f'"{topic}" "{keyword}"' for keyword in solution_keywords]
+        queries = [f'"{topic}" "{keyword}"' for keyword in RedditAdvancedSearch.SOLUTION_KEYWORDS]
         
         return queries
     
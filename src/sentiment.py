@@ -0,0 +1,109 @@
+"""
+Пакетный sentiment анализ с мемоизацией по хэшу текста
+
+Polarity (TextBlob, от -1 до 1) считается один раз на уникальный текст:
+результаты хранятся в персистентном кэше (create_cache) под SHA-1 текста,
+поэтому повторные валидации и кросспосты не пересчитываются. Промахи кэша
+считаются пачками в пуле процессов, если их достаточно много.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from textblob import TextBlob
+
+from .cache import create_cache
+
+
+def _polarity_batch(texts):
+    return [TextBlob(text).sentiment.polarity for text in texts]
+
+
+def text_hash(text):
+    """
+    Ключ кэша для текста
+    """
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class SentimentAnalyzer:
+    """
+    Polarity для колонки текстов с кэшем и пулом процессов
+
+    Пример:
+        analyzer = SentimentAnalyzer()
+        posts_df['sentiment'] = analyzer.polarity(posts_df['title'] + ' ' + posts_df['text'])
+    """
+
+    # Polarity текста не меняется - храним долго
+    CACHE_TTL = 90 * 24 * 60 * 60
+
+    # Меньше этого числа промахов пул процессов не окупается
+    MIN_PARALLEL = 2000
+
+    def __init__(self, cache=None, max_workers=None, batch_size=1000):
+        """
+        Args:
+            cache: кэш результатов (по умолчанию - из CACHE_BACKEND)
+            max_workers: процессов для промахов кэша (по умолчанию - число ядер)
+            batch_size: текстов в одной задаче пула
+        """
+        self.cache = cache if cache is not None else create_cache('sentiment', max_entries=1000000)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def _compute(self, texts):
+        if len(texts) < self.MIN_PARALLEL or self.max_workers < 2:
+            return _polarity_batch(texts)
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            return [value for batch in executor.map(_polarity_batch, batches) for value in batch]
+
+    def polarity(self, texts):
+        """
+        Polarity для каждого текста
+
+        Args:
+            texts: итерируемое строк (None/NaN - пустой текст)
+
+        Returns:
+            numpy float массив в порядке texts
+        """
+        texts = ['' if not isinstance(text, str) else text for text in texts]
+        keys = [text_hash(text) for text in texts]
+
+        # Уникальные тексты: кросспосты и повторы считаются один раз
+        unique = dict(zip(keys, texts))
+        values = self.cache.get_many(list(unique)) if self.cache is not None else {}
+
+        missing = [key for key in unique if key not in values]
+        if missing:
+            computed = dict(zip(missing, self._compute([unique[key] for key in missing])))
+            if self.cache is not None:
+                self.cache.set_many(computed, ttl=self.CACHE_TTL)
+            values.update(computed)
+
+        return np.array([values[key] for key in keys], dtype=float)
+
+    def add_sentiment(self, df, text_columns=('text',)):
+        """
+        Добавить колонку sentiment к DataFrame
+
+        Args:
+            df: DataFrame постов, комментариев или твитов
+            text_columns: колонки, которые склеиваются в анализируемый текст
+        """
+        if df.empty:
+            df['sentiment'] = pd.Series(dtype=float)
+            return df
+
+        texts = df[text_columns[0]].fillna('').astype(str)
+        for column in text_columns[1:]:
+            texts = texts + ' ' + df[column].fillna('').astype(str)
+
+        df['sentiment'] = self.polarity(texts)
+        return df
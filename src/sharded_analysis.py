@@ -0,0 +1,224 @@
+"""
+Шардированный анализ корпуса в пуле процессов
+
+Колонки DataFrame один раз выгружаются в shared memory как NumPy буферы:
+числа, даты и коды категорий - массивами, текст - одним UTF-8 буфером со
+смещениями строк. Worker процессы получают только описание раскладки и
+диапазон строк своего шарда, собирают из буферов DataFrame шарда и запускают
+на нем все запрошенные анализаторы. Результаты шардов объединяются в
+родительском процессе: DataFrame - конкатенацией в порядке шардов, Counter -
+суммированием.
+
+Анализаторы регистрируются в реестре (register_analyzer) модулями scrapers.
+"""
+
+import os
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .post_store import concat_frames
+
+Analyzer = namedtuple('Analyzer', ['function', 'columns', 'merge'])
+
+_ANALYZERS = {}
+
+
+def register_analyzer(name, function, columns, merge='frame'):
+    """
+    Зарегистрировать анализатор для ShardedAnalyzer
+
+    Args:
+        name: имя анализатора (например, 'reddit_pain_points')
+        function: функция DataFrame -> DataFrame или Counter; должна импортироваться
+            по ссылке в worker процессе (функция модуля или classmethod)
+        columns: колонки DataFrame, которые нужны анализатору
+        merge: 'frame' - конкатенация результатов шардов, 'counter' - сумма Counter
+    """
+    if merge not in ('frame', 'counter'):
+        raise ValueError(f"Неизвестный способ объединения: {merge}")
+
+    _ANALYZERS[name] = Analyzer(function, list(columns), merge)
+
+
+def get_analyzer(name):
+    """
+    Зарегистрированный анализатор по имени
+    """
+    try:
+        return _ANALYZERS[name]
+    except KeyError:
+        raise KeyError(f"Анализатор не зарегистрирован: {name}") from None
+
+
+def merge_results(merge, results):
+    """
+    Объединить результаты шардов одного анализатора
+    """
+    if merge == 'counter':
+        total = Counter()
+        for result in results:
+            total.update(result)
+        return total
+
+    return concat_frames(results, ignore_index=True)
+
+
+class _SharedColumns:
+    """
+    Колонки DataFrame в блоках shared memory
+
+    layout - сериализуемое описание для worker процессов:
+    {колонка: (kind, [имена блоков], dtype, extra)}
+    """
+
+    def __init__(self, df, columns):
+        self._blocks = []
+        self.layout = {}
+        self.rows = len(df)
+
+        try:
+            for column in columns:
+                self.layout[column] = self._export(df[column])
+        except Exception:
+            self.close()
+            raise
+
+    def _share(self, array):
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        self._blocks.append(block)
+        return block.name
+
+    def _export(self, series):
+        dtype = series.dtype
+
+        if isinstance(dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            return 'category', [self._share(codes)], str(codes.dtype), list(dtype.categories)
+
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            values = series.to_numpy(dtype='datetime64[ns]').view('int64')
+            return 'datetime', [self._share(values)], 'int64', None
+
+        if dtype == object or pd.api.types.is_string_dtype(dtype):
+            encoded = [
+                value.encode('utf-8') if isinstance(value, str) else b''
+                for value in series.to_numpy(dtype=object)
+            ]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+            return 'text', [self._share(data), self._share(offsets)], 'uint8', None
+
+        values = series.to_numpy()
+        return 'array', [self._share(values)], str(values.dtype), None
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+def _read_shard(layout, rows, start, stop):
+    """
+    Собрать DataFrame строк [start, stop) из блоков shared memory
+    """
+    data = {}
+
+    for column, (kind, names, dtype, extra) in layout.items():
+        # На POSIX worker процессы делят resource tracker родителя, поэтому
+        # повторная регистрация блока при подключении ничего не меняет - удаляет его родитель
+        blocks = [shared_memory.SharedMemory(name=name) for name in names]
+
+        try:
+            if kind == 'text':
+                buffer = np.ndarray((blocks[0].size,), dtype=np.uint8, buffer=blocks[0].buf)
+                offsets = np.ndarray((rows + 1,), dtype=np.int64, buffer=blocks[1].buf)[start:stop + 1]
+                raw = buffer[offsets[0]:offsets[-1]].tobytes()
+                bounds = offsets - offsets[0]
+                data[column] = np.array(
+                    [raw[a:b].decode('utf-8') for a, b in zip(bounds[:-1], bounds[1:])], dtype=object
+                )
+            else:
+                values = np.ndarray((rows,), dtype=dtype, buffer=blocks[0].buf)[start:stop].copy()
+
+                if kind == 'category':
+                    data[column] = pd.Categorical.from_codes(values, categories=extra)
+                elif kind == 'datetime':
+                    data[column] = values.view('datetime64[ns]')
+                else:
+                    data[column] = values
+        finally:
+            for block in blocks:
+                block.close()
+
+    return pd.DataFrame(data, index=pd.RangeIndex(start, stop))
+
+
+def _run_shard(layout, rows, start, stop, analyzers):
+    shard = _read_shard(layout, rows, start, stop)
+    return {name: function(shard[columns]) for name, (function, columns) in analyzers.items()}
+
+
+class ShardedAnalyzer:
+    """
+    Запуск анализаторов по шардам корпуса в пуле процессов
+
+    Пример:
+        results = ShardedAnalyzer(max_workers=16).run(posts_df, ['reddit_pain_points'])
+        results['reddit_pain_points'].head(10)
+    """
+
+    # Меньше этого числа строк запуск процессов и выгрузка в shared memory не окупаются
+    MIN_ROWS = 20000
+
+    def __init__(self, max_workers=None, min_rows=None):
+        """
+        Args:
+            max_workers: количество процессов (по умолчанию - число ядер)
+            min_rows: корпуса меньше этого размера анализируются в текущем процессе
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_rows = self.MIN_ROWS if min_rows is None else min_rows
+
+    def run(self, df, analyzer_names):
+        """
+        Запустить анализаторы на корпусе
+
+        Args:
+            df: DataFrame корпуса
+            analyzer_names: имена зарегистрированных анализаторов
+
+        Returns:
+            dict {имя анализатора: объединенный результат}
+        """
+        analyzers = {name: get_analyzer(name) for name in analyzer_names}
+
+        if df.empty or len(df) < self.min_rows or self.max_workers < 2:
+            return {name: analyzer.function(df) for name, analyzer in analyzers.items()}
+
+        columns = list(dict.fromkeys(column for analyzer in analyzers.values() for column in analyzer.columns))
+        bounds = np.linspace(0, len(df), min(self.max_workers, len(df)) + 1).astype(int)
+        tasks = {name: (analyzer.function, analyzer.columns) for name, analyzer in analyzers.items()}
+
+        shared = _SharedColumns(df, columns)
+        try:
+            with ProcessPoolExecutor(max_workers=len(bounds) - 1) as executor:
+                futures = [
+                    executor.submit(_run_shard, shared.layout, shared.rows, int(start), int(stop), tasks)
+                    for start, stop in zip(bounds[:-1], bounds[1:])
+                ]
+                shard_results = [future.result() for future in futures]
+        finally:
+            shared.close()
+
+        return {
+            name: merge_results(analyzer.merge, [result[name] for result in shard_results])
+            for name, analyzer in analyzers.items()
+        }
@@ -0,0 +1,177 @@
+"""
+Поиск множества ключевых слов в тексте за один проход
+
+Если установлен pyahocorasick, ключевые слова собираются в автомат
+Aho-Corasick один раз, и каждый текст сканируется за один проход
+независимо от числа ключевых слов, с позициями всех (в том числе
+перекрывающихся) вхождений.
+
+Без pyahocorasick используется поиск подстрок средствами str: в CPython он
+работает на уровне C и для десятков ключевых слов быстрее, чем одно
+регулярное выражение с alternation, которое проверяет каждую позицию текста.
+
+Семантика совпадения - подстрока без учета регистра (как `keyword in text.lower()`).
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Разделитель текстов при пакетном сканировании - не встречается в ключевых словах
+_SEPARATOR = '\x00'
+
+
+class KeywordMatcher:
+    """
+    Поиск набора ключевых слов с позициями вхождений
+
+    Пример:
+        matcher = KeywordMatcher(['slow', 'too slow', 'expensive'])
+        matcher.find_all('Too slow and expensive')
+        # [('too slow', 0), ('slow', 4), ('expensive', 13)]
+    """
+
+    def __init__(self, keywords):
+        """
+        Args:
+            keywords: список ключевых слов (порядок задает порядок в matched())
+        """
+        self.keywords = list(dict.fromkeys(k.lower() for k in keywords if k))
+        self._order = {keyword: index for index, keyword in enumerate(self.keywords)}
+
+        self._automaton = None
+        if ahocorasick is not None and self.keywords:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+
+    @classmethod
+    def for_keywords(cls, keywords):
+        """
+        Закэшированный matcher для набора ключевых слов (сборка один раз на процесс)
+        """
+        return _cached_matcher(tuple(keywords))
+
+    def find_all(self, text):
+        """
+        Все вхождения ключевых слов
+
+        Returns:
+            список (keyword, offset), отсортированный по позиции в тексте
+        """
+        if not text or not self.keywords:
+            return []
+
+        text = text.lower()
+
+        if self._automaton is not None:
+            # Автомат возвращает позицию последнего символа вхождения
+            found = [
+                (keyword, end - len(keyword) + 1)
+                for end, keyword in self._automaton.iter(text)
+            ]
+        else:
+            found = []
+            for keyword in self.keywords:
+                offset = text.find(keyword)
+                while offset != -1:
+                    found.append((keyword, offset))
+                    offset = text.find(keyword, offset + 1)
+
+        found.sort(key=lambda match: (match[1], -len(match[0])))
+        return found
+
+    def matched(self, text):
+        """
+        Найденные ключевые слова без повторов в порядке списка keywords
+        """
+        if not text or not self.keywords:
+            return []
+
+        text = text.lower()
+
+        if self._automaton is None:
+            return [keyword for keyword in self.keywords if keyword in text]
+
+        found = {keyword for _, keyword in self._automaton.iter(text)}
+        return sorted(found, key=self._order.__getitem__)
+
+    def first(self, text):
+        """
+        Первое по порядку списка keywords найденное ключевое слово или None
+        """
+        if self._automaton is None and text:
+            text = text.lower()
+            return next((keyword for keyword in self.keywords if keyword in text), None)
+
+        matched = self.matched(text)
+        return matched[0] if matched else None
+
+    def hit_matrix(self, texts, chunk_size=50000):
+        """
+        Разреженная матрица совпадений тексты × ключевые слова
+
+        Тексты склеиваются через разделитель и сканируются одним проходом на
+        пачку из chunk_size текстов; позиции вхождений переводятся в номера
+        строк через searchsorted по смещениям начала текстов.
+
+        Args:
+            texts: pandas Series строк (NaN считается пустой строкой)
+            chunk_size: сколько текстов сканировать за раз (ограничивает память)
+
+        Returns:
+            scipy.sparse.csr_matrix bool формы (len(texts), len(keywords)),
+            колонки в порядке keywords, индексы в строках отсортированы
+        """
+        texts = texts.fillna('').astype(str)
+        row_parts = []
+        column_parts = []
+
+        for chunk_start in range(0, len(texts), chunk_size):
+            # Смещения считаем по уже приведенным к нижнему регистру текстам: lower() может
+            # удлинять строку ('İ' -> 'i̇'), и смещения исходных текстов разъехались бы
+            chunk = texts.iloc[chunk_start:chunk_start + chunk_size].str.lower()
+            lengths = chunk.str.len().to_numpy(dtype=np.int64)
+            starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+
+            found = self.find_all(_SEPARATOR.join(chunk.tolist()))
+            if not found:
+                continue
+
+            offsets = np.fromiter((offset for _, offset in found), dtype=np.int64, count=len(found))
+            row_parts.append(chunk_start + np.searchsorted(starts, offsets, side='right') - 1)
+            column_parts.append(np.fromiter(
+                (self._order[keyword] for keyword, _ in found), dtype=np.int32, count=len(found)
+            ))
+
+        rows = np.concatenate(row_parts) if row_parts else np.empty(0, dtype=np.int64)
+        columns = np.concatenate(column_parts) if column_parts else np.empty(0, dtype=np.int32)
+
+        # Повторные вхождения складываются, поэтому приводим к bool после сборки
+        hits = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, columns)),
+            shape=(len(texts), len(self.keywords))
+        )
+        hits.sum_duplicates()
+        return hits.astype(bool)
+
+    def match_many(self, texts):
+        """
+        matched() для каждого текста
+
+        Returns:
+            список списков ключевых слов в порядке texts
+        """
+        return [self.matched(text) for text in texts]
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(keywords):
+    return KeywordMatcher(keywords)
@@ -5,16 +5,108 @@ Twitter/X Scraper для валидации SaaS идей
 """
 
 import tweepy
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 import re
-from collections import Counter
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import time
 
+from .cache import create_cache
+from .cooccurrence import CooccurrenceMatrix
+from .entities import add_entities, extract_entities
+from .inverted_index import InvertedIndex
+from .near_duplicates import collapse_near_duplicates
+from .post_corpus import create_corpus
+from .post_store import PostStore, TWEET_SCHEMA, USER_TWEET_SCHEMA, concat_frames
+from .query_planner import TWITTER_MAX_QUERY_LENGTH, attribute_keywords, format_operand, or_group, pack_keywords
+from .rate_limiter import create_rate_limiter
+from .sentiment import SentimentAnalyzer
+from .sharded_analysis import ShardedAnalyzer, register_analyzer
+from .text_matching import KeywordMatcher
+
+CompiledQuery = namedtuple('CompiledQuery', ['query', 'keywords', 'intent'])
+
+
+class RateLimitedClient(tweepy.Client):
+    """
+    tweepy.Client, пропускающий каждый запрос через RateLimiter своего endpoint
+    
+    Квоты Twitter API v2 считаются отдельно для каждого endpoint, поэтому
+    limiter создается на маршрут (id в пути заменяются на :id)
+    """
+    
+    # Консервативная квота до первого ответа с заголовками x-rate-limit-*
+    DEFAULT_CAPACITY = 180
+    DEFAULT_PERIOD = 15 * 60
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limiters = {}
+        self._rate_limiters_lock = threading.Lock()
+    
+    def _rate_limiter(self, route):
+        endpoint = re.sub(r'(?<=.)/\d+', '/:id', route)
+        # Запросы идут из нескольких потоков - limiter endpoint должен быть один
+        with self._rate_limiters_lock:
+            if endpoint not in self.rate_limiters:
+                self.rate_limiters[endpoint] = create_rate_limiter(
+                    f'twitter:{endpoint}', self.DEFAULT_CAPACITY, self.DEFAULT_PERIOD
+                )
+            return self.rate_limiters[endpoint]
+    
+    def request(self, method, route, params=None, json=None, user_auth=False):
+        rate_limiter = self._rate_limiter(route)
+        rate_limiter.acquire()
+        
+        try:
+            response = super().request(method, route, params=params, json=json, user_auth=user_auth)
+        except tweepy.errors.HTTPException as e:
+            rate_limiter.record_response(e.response.status_code, e.response.headers)
+            raise
+        
+        rate_limiter.record_response(response.status_code, response.headers)
+        return response
+
 
 class TwitterSaaSValidator:
-    def __init__(self, bearer_token):
+    # Маркеры проблем и фрустрации в тексте
+    PAIN_KEYWORDS = [
+        'struggling', 'frustrated', 'annoying', 'waste time',
+        'difficult', 'problem', 'issue', 'broken', 'hate',
+        'wish', 'need', 'missing', 'slow', 'expensive',
+        'complicated', 'confusing'
+    ]
+    
+    # search_recent_tweets отдает от 10 до 100 твитов за запрос
+    PAGE_SIZE = 100
+    
+    TWEET_FIELDS = ['created_at', 'public_metrics', 'author_id', 'lang', 'entities']
+    USER_FIELDS = ['username', 'name', 'public_metrics']
+    
+    # Ссылки на саму платформу (t.co без раскрытия, фото, цитаты) - не внешние сайты
+    PLATFORM_DOMAINS = ('t.co', 'twitter.com', 'x.com')
+    
+    # get_users принимает до 100 usernames за запрос
+    USERS_BATCH_SIZE = 100
+    
+    # username -> id не меняется, метрики аккаунта почти не меняются в течение дня
+    USER_INFO_TTL = 24 * 60 * 60
+    
+    # Scope checkpoint'ов в корпусе: у recent search нет деления на сообщества
+    CORPUS_SCOPE = 'recent'
+    
+    # Несобранный промежуток (бюджет оборвал листание) - две границы отдельными checkpoint'ами
+    GAP_SINCE_SCOPE = 'recent:gap_since'
+    GAP_UNTIL_SCOPE = 'recent:gap_until'
+    
+    # get_tweets принимает до 100 id за запрос
+    LOOKUP_BATCH_SIZE = 100
+    
+    def __init__(self, bearer_token, corpus=None):
         """
         Инициализация Twitter API v2 клиента
         
@@ -22,253 +114,692 @@ class TwitterSaaSValidator:
         1. Перейдите на https://developer.twitter.com/en/portal/dashboard
         2. Создайте новое приложение
         3. Получите Bearer Token из раздела "Keys and tokens"
+        
+        Args:
+            bearer_token: Bearer Token приложения
+            corpus: PostCorpus для инкрементального сбора (по умолчанию - из CORPUS_PATH)
         """
-        self.client = tweepy.Client(bearer_token=bearer_token)
+        self.client = RateLimitedClient(bearer_token=bearer_token)
+        self.sentiment_analyzer = SentimentAnalyzer()
+        self.user_cache = create_cache('twitter_users')
+        self.corpus = corpus if corpus is not None else create_corpus(
+            'twitter', schema=TWEET_SCHEMA, time_column='created_at'
+        )
     
-    def search_tweets(self, query, max_results=100, days_back=7):
+    @staticmethod
+    def _tweet_rows(response):
+        """
+        Записи TWEET_SCHEMA из одной страницы ответа search_recent_tweets
+        """
+        # Создаем словарь пользователей
+        users = {user.id: user for user in response.includes.get('users', [])}
+        rows = []
+        
+        for tweet in response.data or []:
+            user = users.get(tweet.author_id)
+            metrics = tweet.public_metrics
+            
+            # В тексте твита только короткие ссылки t.co - исходные адреса храним отдельно
+            expanded_urls = ' '.join(
+                url['expanded_url'] for url in (tweet.entities or {}).get('urls', [])
+                if url.get('expanded_url') and 'media_key' not in url
+            )
+            
+            rows.append((
+                tweet.id,
+                tweet.text,
+                tweet.created_at.timestamp(),
+                tweet.lang,
+                metrics['like_count'],
+                metrics['retweet_count'],
+                metrics['reply_count'],
+                metrics.get('impression_count', 0),
+                user.username if user else None,
+                user.name if user else None,
+                user.public_metrics['followers_count'] if user else 0,
+                expanded_urls,
+            ))
+        
+        return rows
+    
+    def iter_tweet_pages(self, query, max_results=1000, days_back=7, since=None, since_id=None, until_id=None):
+        """
+        Лениво листать результаты поиска страницами (tweepy.Paginator)
+        
+        Следующая страница запрашивается только когда нужна, а сырые объекты
+        ответа отбрасываются сразу после перевода в записи - в памяти не
+        больше одной страницы ответа.
+        
+        Args:
+            query: поисковый запрос (может включать операторы)
+            max_results: бюджет твитов - после него запросы прекращаются
+            days_back: сколько дней назад искать (recent search - не больше 7)
+            since: datetime в UTC без tzinfo - не брать твиты старше; останавливает листание,
+                как только страница дошла до этой даты
+            since_id: брать только твиты новее этого id (вместо start_time)
+            until_id: брать только твиты старше этого id
+            
+        Yields:
+            список записей TWEET_SCHEMA одной страницы (от новых к старым)
+        """
+        start_time = datetime.utcnow() - timedelta(days=days_back)
+        if since is not None:
+            start_time = max(start_time, since)
+        cutoff = start_time.replace(tzinfo=timezone.utc).timestamp()
+        
+        # since_id и start_time взаимоисключающие: since_id точнее и отсекает уже собранное
+        window = {'since_id': since_id} if since_id else {'start_time': start_time}
+        if until_id:
+            window['until_id'] = until_id
+        
+        paginator = tweepy.Paginator(
+            self.client.search_recent_tweets,
+            query=query,
+            max_results=min(max(max_results, 10), self.PAGE_SIZE),
+            **window,
+            tweet_fields=self.TWEET_FIELDS,
+            expansions=['author_id'],
+            user_fields=self.USER_FIELDS,
+            limit=-(-max_results // self.PAGE_SIZE)
+        )
+        
+        remaining = max_results
+        for response in paginator:
+            rows = self._tweet_rows(response)
+            
+            # Твиты идут от новых к старым: все после первого слишком старого тоже старые
+            fresh = [row for row in rows if row[2] >= cutoff]
+            page = fresh[:remaining]
+            if page:
+                yield page
+            
+            remaining -= len(page)
+            if remaining <= 0 or len(fresh) < len(rows):
+                break
+    
+    def search_tweets(self, query, max_results=100, days_back=7, since=None):
         """
         Поиск твитов по запросу
         
         Args:
             query: поисковый запрос (может включать операторы)
-            max_results: максимальное количество твитов (10-100 за запрос)
+            max_results: максимальное количество твитов (больше 100 - постранично)
             days_back: сколько дней назад искать
+            since: datetime в UTC без tzinfo - не брать твиты старше
             
         Returns:
             DataFrame с твитами
         """
-        tweets_data = []
-        
-        # Временной фильтр
-        start_time = datetime.utcnow() - timedelta(days=days_back)
+        store = PostStore(TWEET_SCHEMA)
         
         print(f"Поиск твитов по запросу: {query}")
         print(f"Период: последние {days_back} дней")
         
         try:
-            # Поиск с метриками
-            tweets = self.client.search_recent_tweets(
-                query=query,
-                max_results=max_results,
-                start_time=start_time,
-                tweet_fields=['created_at', 'public_metrics', 'author_id', 'lang'],
-                expansions=['author_id'],
-                user_fields=['username', 'name', 'public_metrics']
-            )
+            # Страницы сразу складываются в колоночное хранилище
+            for page in self.iter_tweet_pages(query, max_results=max_results, days_back=days_back, since=since):
+                store.extend(page)
             
-            if not tweets.data:
-                print("Твиты не найдены")
+        except tweepy.errors.TweepyException as e:
+            print(f"❌ Ошибка Twitter API: {e}")
+            if not len(store):
                 return pd.DataFrame()
+            print(f"⚠️ Используем {len(store)} твитов, полученных до ошибки")
+        
+        if not len(store):
+            print("Твиты не найдены")
+            return pd.DataFrame()
+        
+        print(f"✅ Найдено {len(store)} твитов")
+        
+        return self._tweets_frame(store)
+    
+    def search_tweets_incremental(self, query, corpus, max_results=100, days_back=7, refresh_days=2,
+                                  refresh_metrics=True):
+        """
+        Инкрементальный поиск с курсором since_id по запросу
+        
+        Первый запуск собирает окно days_back. Повторные запуски запрашивают
+        только твиты новее сохраненного курсора (since_id), объединяют их с
+        корпусом и обновляют метрики твитов за последние refresh_days.
+        
+        Если бюджет max_results кончился раньше выдачи, между курсором и самым
+        старым полученным твитом остается промежуток: его границы сохраняются,
+        и следующие запуски дособирают его через since_id/until_id.
+        
+        Args:
+            query: скомпилированный поисковый запрос
+            corpus: PostCorpus (platform='twitter', схема TWEET_SCHEMA)
+            max_results: максимум новых твитов за один запуск
+            days_back: окно анализа в днях (recent search - не больше 7)
+            refresh_days: за сколько последних дней обновлять метрики твитов
+            refresh_metrics: обновлять likes/retweets/replies через get_tweets
             
-            # Создаем словарь пользователей
-            users = {user.id: user for user in tweets.includes.get('users', [])}
+        Returns:
+            DataFrame с твитами окна
+        """
+        scope = self.CORPUS_SCOPE
+        now = time.time()
+        window_start = now - days_back * 24 * 60 * 60
+        checkpoint = corpus.get_checkpoint(scope, query)
+        gap = self._get_gap(corpus, query, window_start)
+        
+        # Курсор старше окна recent search API не примет - тогда берем от начала окна
+        def cursor(created, tweet_id):
+            return tweet_id if tweet_id and created > window_start else None
+        
+        since_id = cursor(*checkpoint) if checkpoint else None
+        new_store = PostStore(TWEET_SCHEMA)
+        created_index = new_store.columns.index('created_at')
+        refreshed = []
+        
+        try:
+            # Сначала новые твиты после курсора
+            fetched = self._collect_pages(new_store, query, max_results, days_back, since_id=since_id)
+            newest_rows = new_store.rows()
             
-            for tweet in tweets.data:
-                user = users.get(tweet.author_id)
-                
-                tweet_info = {
-                    'id': tweet.id,
-                    'text': tweet.text,
-                    'created_at': tweet.created_at,
-                    'lang': tweet.lang,
-                    'likes': tweet.public_metrics['like_count'],
-                    'retweets': tweet.public_metrics['retweet_count'],
-                    'replies': tweet.public_metrics['reply_count'],
-                    'impressions': tweet.public_metrics.get('impression_count', 0),
-                    'engagement': tweet.public_metrics['like_count'] + 
-                                 tweet.public_metrics['retweet_count'] + 
-                                 tweet.public_metrics['reply_count'],
-                    'author_username': user.username if user else None,
-                    'author_name': user.name if user else None,
-                    'author_followers': user.public_metrics['followers_count'] if user else 0,
-                    'url': f"https://twitter.com/i/web/status/{tweet.id}"
-                }
+            if fetched >= max_results:
+                # Бюджет оборвал листание: промежуток до курсора (или старого промежутка) не собран
+                oldest = min(newest_rows, key=lambda row: row[0])
+                lower = (gap[0], gap[1]) if gap else (checkpoint or (window_start, ''))
+                gap = (lower[0], lower[1], oldest[created_index], str(oldest[0]))
+            elif gap:
+                # Остаток бюджета - на дособирание промежутка
+                budget = max_results - fetched
+                gap_store = PostStore(TWEET_SCHEMA)
+                gap_fetched = self._collect_pages(
+                    gap_store, query, budget, days_back,
+                    since_id=cursor(gap[0], gap[1]), until_id=gap[3]
+                )
+                gap_rows = gap_store.rows()
+                new_store.extend(gap_rows)
                 
-                tweets_data.append(tweet_info)
+                if gap_fetched >= budget:
+                    oldest = min(gap_rows, key=lambda row: row[0])
+                    gap = (gap[0], gap[1], oldest[created_index], str(oldest[0]))
+                else:
+                    gap = None
             
-            print(f"✅ Найдено {len(tweets_data)} твитов")
+            new_rows = new_store.rows()
+            if refresh_metrics and checkpoint:
+                new_ids = {str(row[0]) for row in new_rows}
+                refresh_ids = [
+                    tweet_id for tweet_id in corpus.ids_since(now - refresh_days * 24 * 60 * 60, scope, query)
+                    if tweet_id not in new_ids
+                ]
+                refreshed = self._lookup_tweets(refresh_ids)
             
         except tweepy.errors.TweepyException as e:
             print(f"❌ Ошибка Twitter API: {e}")
             return pd.DataFrame()
         
-        return pd.DataFrame(tweets_data)
+        corpus.add_rows(new_rows, scope=scope, query=query)
+        corpus.add_rows(refreshed)
+        
+        if newest_rows:
+            # id твитов (snowflake) растут со временем
+            newest = max(newest_rows, key=lambda row: row[0])
+            corpus.save_checkpoint(scope, query, newest[created_index], newest[0])
+        elif not checkpoint:
+            corpus.save_checkpoint(scope, query, window_start, '')
+        self._save_gap(corpus, query, gap)
+        
+        print(f"🔁 '{query}' - {len(new_rows)} новых твитов, {len(refreshed)} обновлено"
+              + (" (остался несобранный промежуток)" if gap else ""))
+        
+        window = corpus.load(scope, query, since=window_start)
+        if not len(window):
+            return pd.DataFrame()
+        
+        return self._tweets_frame(window)
+    
+    def _collect_pages(self, store, query, max_results, days_back, since_id=None, until_id=None):
+        """
+        Сложить страницы поиска в store
+        
+        Returns:
+            сколько твитов получено (равно max_results - листание оборвал бюджет)
+        """
+        fetched = 0
+        for page in self.iter_tweet_pages(query, max_results=max_results, days_back=days_back,
+                                          since_id=since_id, until_id=until_id):
+            store.extend(page)
+            fetched += len(page)
+        return fetched
+    
+    def _get_gap(self, corpus, query, window_start):
+        """
+        Несобранный промежуток запроса внутри окна:
+        (created и id нижней границы, created и id верхней) или None
+        """
+        since = corpus.get_checkpoint(self.GAP_SINCE_SCOPE, query)
+        until = corpus.get_checkpoint(self.GAP_UNTIL_SCOPE, query)
+        # Промежуток, целиком ушедший из окна, дособирать незачем
+        if not until or not until[1] or until[0] <= window_start:
+            return None
+        return since[0], since[1], until[0], until[1]
+    
+    def _save_gap(self, corpus, query, gap):
+        """
+        Сохранить промежуток (None - промежутка нет)
+        """
+        if gap is None:
+            if corpus.get_checkpoint(self.GAP_UNTIL_SCOPE, query):
+                corpus.save_checkpoint(self.GAP_UNTIL_SCOPE, query, 0, '')
+            return
+        
+        corpus.save_checkpoint(self.GAP_SINCE_SCOPE, query, gap[0], gap[1])
+        corpus.save_checkpoint(self.GAP_UNTIL_SCOPE, query, gap[2], gap[3])
+    
+    def _lookup_tweets(self, tweet_ids):
+        """
+        Актуальные записи TWEET_SCHEMA для твитов по id (пачками по LOOKUP_BATCH_SIZE)
+        """
+        rows = []
+        
+        for start in range(0, len(tweet_ids), self.LOOKUP_BATCH_SIZE):
+            response = self.client.get_tweets(
+                ids=tweet_ids[start:start + self.LOOKUP_BATCH_SIZE],
+                tweet_fields=self.TWEET_FIELDS,
+                expansions=['author_id'],
+                user_fields=self.USER_FIELDS
+            )
+            rows.extend(self._tweet_rows(response))
+        
+        return rows
     
-    def search_multiple_keywords(self, keywords, max_results_per_keyword=50, days_back=7):
+    @staticmethod
+    def _tweets_frame(store):
+        """
+        Типизированный DataFrame твитов с engagement и url, посчитанными для всей колонки
+        """
+        tweets_df = store.to_frame()
+        tweets_df['engagement'] = tweets_df['likes'] + tweets_df['retweets'] + tweets_df['replies']
+        tweets_df['url'] = 'https://twitter.com/i/web/status/' + tweets_df['id'].astype(str)
+        return tweets_df
+    
+    def search_multiple_keywords(self, keywords, max_results_per_keyword=50, days_back=7, pack_queries=True,
+                                 intents=('keywords',), corpus=None):
         """
         Поиск по нескольким ключевым словам
+        
+        Ключевые слова упаковываются в OR запросы до лимита длины запроса, после
+        поиска каждый твит атрибутируется к своим ключевым словам локально.
+        
+        Args:
+            keywords: список ключевых слов
+            max_results_per_keyword: бюджет твитов на ключевое слово
+            days_back: сколько дней назад искать
+            pack_queries: упаковывать ключевые слова в OR запросы (меньше запросов к API)
+            intents: группы запросов из TwitterAdvancedSearch.QUERY_TEMPLATES
+                ('keywords', 'pain', 'solution', 'willingness_to_pay')
+            corpus: PostCorpus - докачивать только твиты новее курсора since_id запроса
+            
+        Returns:
+            DataFrame твитов с колонками keyword (первое совпавшее ключевое слово),
+            matched_keywords и intents
         """
         all_tweets = []
         
-        for keyword in keywords:
-            print(f"  Поиск: {keyword}")
-            tweets_df = self.search_tweets(
-                query=keyword,
-                max_results=max_results_per_keyword,
-                days_back=days_back
-            )
+        query_groups = TwitterAdvancedSearch.compile_queries(keywords, intents, pack=pack_queries)
+        if pack_queries:
+            print(f"  {len(keywords)} ключевых слов x {len(intents)} групп упаковано "
+                  f"в {len(query_groups)} запрос(ов)")
+        
+        for group in query_groups:
+            print(f"  Поиск: {group.query}")
+            if corpus is not None:
+                tweets_df = self.search_tweets_incremental(
+                    group.query,
+                    corpus,
+                    max_results=max_results_per_keyword * len(group.keywords),
+                    days_back=days_back
+                )
+            else:
+                tweets_df = self.search_tweets(
+                    query=group.query,
+                    max_results=max_results_per_keyword * len(group.keywords),
+                    days_back=days_back
+                )
             
             if not tweets_df.empty:
-                tweets_df['keyword'] = keyword
+                tweets_df['matched_keywords'] = attribute_keywords(tweets_df['text'], group.keywords)
+                tweets_df['intents'] = [[group.intent] for _ in range(len(tweets_df))]
                 all_tweets.append(tweets_df)
-            
-            # Задержка между запросами (rate limit)
-            time.sleep(2)
         
         if not all_tweets:
             return pd.DataFrame()
         
-        combined = pd.concat(all_tweets, ignore_index=True)
+        combined = concat_frames(all_tweets, ignore_index=True)
+        
+        # Твит мог прийти из нескольких запросов - объединяем ключевые слова и группы
+        merged = combined.groupby('id', sort=False)[['matched_keywords', 'intents']].agg(
+            lambda lists: list(dict.fromkeys(item for items in lists for item in items))
+        )
         
         # Удаляем дубликаты по ID
         combined = combined.drop_duplicates(subset=['id'])
+        combined['matched_keywords'] = combined['id'].map(merged['matched_keywords'])
+        combined['intents'] = combined['id'].map(merged['intents'])
+        combined['keyword'] = combined['matched_keywords'].str[0]
         
         return combined
     
-    def find_pain_points(self, tweets_df):
+    @classmethod
+    def find_pain_points(cls, tweets_df):
         """
         Анализ болевых точек в твитах
         """
         if tweets_df.empty:
             return pd.DataFrame()
         
-        pain_keywords = [
-            'struggling', 'frustrated', 'annoying', 'waste time',
-            'difficult', 'problem', 'issue', 'broken', 'hate',
-            'wish', 'need', 'missing', 'slow', 'expensive',
-            'complicated', 'confusing'
-        ]
+        matcher = KeywordMatcher.for_keywords(cls.PAIN_KEYWORDS)
+        hits = matcher.hit_matrix(tweets_df['text'])
+        pain_rows = np.flatnonzero(np.diff(hits.indptr))
         
-        pain_tweets = []
+        if len(pain_rows) == 0:
+            return pd.DataFrame()
         
-        for _, tweet in tweets_df.iterrows():
-            text_lower = tweet['text'].lower()
-            
-            for keyword in pain_keywords:
-                if keyword in text_lower:
-                    pain_tweets.append({
-                        'tweet_id': tweet['id'],
-                        'text': tweet['text'],
-                        'keyword': keyword,
-                        'engagement': tweet['engagement'],
-                        'created_at': tweet['created_at'],
-                        'url': tweet['url']
-                    })
-                    break  # Один твит считаем только один раз
-        
-        return pd.DataFrame(pain_tweets)
-    
-    def analyze_hashtags(self, tweets_df):
+        pain_df = tweets_df.iloc[pain_rows].reset_index(drop=True)
+        
+        # Один твит считаем только один раз - по первому маркеру из списка
+        # (индексы в строках CSR отсортированы по порядку PAIN_KEYWORDS)
+        keywords = np.array(matcher.keywords, dtype=object)
+        
+        return pd.DataFrame({
+            'tweet_id': pain_df['id'],
+            'text': pain_df['text'],
+            'keyword': keywords[hits.indices[hits.indptr[pain_rows]]],
+            'engagement': pain_df['engagement'],
+            'created_at': pain_df['created_at'],
+            'url': pain_df['url']
+        })
+    
+    @staticmethod
+    def analyze_hashtags(tweets_df):
         """
         Анализ популярных хештегов
         """
         if tweets_df.empty:
             return Counter()
         
-        hashtags = []
-        for text in tweets_df['text']:
-            found_hashtags = re.findall(r'#(\w+)', text)
-            hashtags.extend([h.lower() for h in found_hashtags])
-        
-        return Counter(hashtags)
+        return extract_entities(tweets_df['text'], ['hashtags'], with_columns=False).counts['hashtags']
     
-    def analyze_mentions(self, tweets_df):
+    @staticmethod
+    def analyze_mentions(tweets_df):
         """
         Анализ упоминаний (@mentions) - часто это конкуренты
         """
         if tweets_df.empty:
             return Counter()
         
-        mentions = []
-        for text in tweets_df['text']:
-            found_mentions = re.findall(r'@(\w+)', text)
-            mentions.extend([m.lower() for m in found_mentions])
-        
-        return Counter(mentions)
+        return extract_entities(tweets_df['text'], ['mentions'], with_columns=False).counts['mentions']
     
-    def get_user_tweets(self, username, max_results=100):
+    def count_tweets(self, keywords, days_back=7, intent='keywords'):
         """
-        Получить твиты конкретного пользователя
+        Объем твитов по ключевым словам без скачивания твитов
         
-        Полезно для анализа конкурентов или thought leaders
+        Recent counts endpoint отдает число твитов по дням одним запросом на
+        ключевое слово и не расходует месячный лимит твитов.
+        
+        Args:
+            keywords: список ключевых слов
+            days_back: за сколько дней считать (не больше 7)
+            intent: группа запросов из TwitterAdvancedSearch.QUERY_TEMPLATES
+            
+        Returns:
+            dict {ключевое слово: {'total': int, 'daily': {дата 'YYYY-MM-DD': int}}};
+            ключевые слова, для которых запрос не удался, отсутствуют
         """
-        try:
-            user = self.client.get_user(username=username)
+        start_time = datetime.utcnow() - timedelta(days=days_back)
+        volume = {}
+        
+        # Счетчики нельзя атрибутировать внутри OR запроса - по запросу на ключевое слово
+        for query in TwitterAdvancedSearch.compile_queries(keywords, [intent], pack=False):
+            keyword = query.keywords[0]
             
-            if not user.data:
-                print(f"Пользователь @{username} не найден")
-                return pd.DataFrame()
+            try:
+                response = self.client.get_recent_tweets_count(
+                    query.query, granularity='day', start_time=start_time
+                )
+            except tweepy.errors.TweepyException as e:
+                print(f"❌ Ошибка подсчета твитов для '{keyword}': {e}")
+                continue
             
-            user_id = user.data.id
+            daily = {bucket['start'][:10]: bucket['tweet_count'] for bucket in response.data or []}
+            volume[keyword] = {
+                'total': response.meta.get('total_tweet_count', sum(daily.values())),
+                'daily': daily
+            }
+        
+        return volume
+    
+    @staticmethod
+    def top_keywords(volume, top_n=3):
+        """
+        Ключевые слова с наибольшим объемом (для полного скачивания твитов)
+        """
+        ranked = sorted(volume.items(), key=lambda item: item[1]['total'], reverse=True)
+        return [keyword for keyword, counts in ranked[:top_n] if counts['total'] > 0]
+    
+    def resolve_users(self, usernames):
+        """
+        Информация о пользователях пачками по USERS_BATCH_SIZE через get_users
+        
+        Результаты кэшируются на USER_INFO_TTL. Несуществующие и заблокированные
+        аккаунты кэшируются негативно и не запрашиваются повторно.
+        
+        Args:
+            usernames: список username (без @)
             
-            tweets = self.client.get_users_tweets(
-                id=user_id,
-                max_results=max_results,
-                tweet_fields=['created_at', 'public_metrics']
-            )
+        Returns:
+            dict {username: {'id', 'username', 'name', 'followers', 'following', 'tweet_count'} или None}
+        """
+        usernames = list(dict.fromkeys(username.lstrip('@') for username in usernames))
+        cached = {}
+        
+        if self.user_cache is not None:
+            cached = self.user_cache.get_many([username.lower() for username in usernames])
+        
+        missing = [username for username in usernames if username.lower() not in cached]
+        
+        for start in range(0, len(missing), self.USERS_BATCH_SIZE):
+            batch = missing[start:start + self.USERS_BATCH_SIZE]
+            fetched = {username.lower(): {'exists': False} for username in batch}
             
-            if not tweets.data:
-                return pd.DataFrame()
+            try:
+                response = self.client.get_users(usernames=batch, user_fields=self.USER_FIELDS)
+            except tweepy.errors.TweepyException as e:
+                # Ошибку API не кэшируем - пользователи будут запрошены в следующий раз
+                print(f"❌ Ошибка: {e}")
+                continue
             
-            tweets_data = []
-            for tweet in tweets.data:
-                tweets_data.append({
-                    'text': tweet.text,
-                    'created_at': tweet.created_at,
-                    'likes': tweet.public_metrics['like_count'],
-                    'retweets': tweet.public_metrics['retweet_count'],
-                    'replies': tweet.public_metrics['reply_count'],
-                    'engagement': tweet.public_metrics['like_count'] + 
-                                 tweet.public_metrics['retweet_count'] + 
-                                 tweet.public_metrics['reply_count']
-                })
+            for user in response.data or []:
+                metrics = user.public_metrics or {}
+                fetched[user.username.lower()] = {
+                    'exists': True,
+                    'id': user.id,
+                    'username': user.username,
+                    'name': user.name,
+                    'followers': metrics.get('followers_count', 0),
+                    'following': metrics.get('following_count', 0),
+                    'tweet_count': metrics.get('tweet_count', 0),
+                }
             
-            return pd.DataFrame(tweets_data)
+            if self.user_cache is not None:
+                self.user_cache.set_many(fetched, ttl=self.USER_INFO_TTL)
             
-        except tweepy.errors.TweepyException as e:
-            print(f"❌ Ошибка: {e}")
+            cached.update(fetched)
+        
+        return {username: self._user_info(cached.get(username.lower())) for username in usernames}
+    
+    @staticmethod
+    def _user_info(entry):
+        if not entry or not entry.get('exists'):
+            return None
+        
+        return {key: value for key, value in entry.items() if key != 'exists'}
+    
+    def _user_timeline(self, user_id, max_results=100):
+        """
+        Последние твиты пользователя по id
+        """
+        tweets = self.client.get_users_tweets(
+            id=user_id,
+            max_results=max_results,
+            tweet_fields=['created_at', 'public_metrics']
+        )
+        
+        store = PostStore(USER_TWEET_SCHEMA)
+        for tweet in tweets.data or []:
+            store.append((
+                tweet.text,
+                tweet.created_at.timestamp(),
+                tweet.public_metrics['like_count'],
+                tweet.public_metrics['retweet_count'],
+                tweet.public_metrics['reply_count'],
+            ))
+        
+        if not len(store):
             return pd.DataFrame()
+        
+        tweets_df = store.to_frame()
+        tweets_df['engagement'] = tweets_df['likes'] + tweets_df['retweets'] + tweets_df['replies']
+        return tweets_df
+    
+    def get_users_tweets(self, usernames, max_results=100, max_workers=4):
+        """
+        Твиты нескольких пользователей: id - пачками из кэша/get_users,
+        таймлайны - параллельно (каждый запрос проходит через rate limiter endpoint)
+        
+        Args:
+            usernames: список username (без @)
+            max_results: твитов на пользователя (5-100)
+            max_workers: количество параллельных потоков
+            
+        Returns:
+            dict {username: DataFrame твитов} (пустой DataFrame, если пользователь не найден)
+        """
+        users = self.resolve_users(usernames)
+        
+        for username, user in users.items():
+            if user is None:
+                print(f"Пользователь @{username} не найден")
+        
+        def fetch(username):
+            try:
+                return self._user_timeline(users[username]['id'], max_results)
+            except tweepy.errors.TweepyException as e:
+                print(f"❌ Ошибка @{username}: {e}")
+                return pd.DataFrame()
+        
+        found = [username for username, user in users.items() if user is not None]
+        results = {username: pd.DataFrame() for username in users}
+        
+        if found:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(found)))) as executor:
+                results.update(zip(found, executor.map(fetch, found)))
+        
+        return results
     
-    def generate_report(self, keywords, output_file='twitter_analysis.json'):
+    def get_user_tweets(self, username, max_results=100):
+        """
+        Получить твиты конкретного пользователя
+        
+        Полезно для анализа конкурентов или thought leaders
+        """
+        username = username.lstrip('@')
+        return self.get_users_tweets([username], max_results=max_results, max_workers=1)[username]
+    
+    def generate_report(self, keywords, output_file='twitter_analysis.json', analysis_workers=None,
+                        competitor_names=None, max_results_per_keyword=100, query_intents=('keywords',)):
         """
         Генерирует полный отчет для валидации идеи
+        
+        Args:
+            keywords: ключевые слова для поиска
+            output_file: файл для сохранения отчета
+            analysis_workers: процессов для анализа больших корпусов (по умолчанию - число ядер)
+            competitor_names: названия конкурентов для лексиконов и co-occurrence
+            max_results_per_keyword: бюджет твитов на ключевое слово (больше 100 - постранично)
+            query_intents: группы запросов TwitterAdvancedSearch.QUERY_TEMPLATES
         """
         print(f"\n{'='*60}")
         print(f"Twitter/X Анализ")
         print(f"{'='*60}\n")
         
         # Собираем твиты
-        tweets_df = self.search_multiple_keywords(keywords, max_results_per_keyword=100)
+        tweets_df = self.search_multiple_keywords(
+            keywords, max_results_per_keyword=max_results_per_keyword, intents=query_intents,
+            corpus=self.corpus
+        )
         
         if tweets_df.empty:
             print("❌ Твиты не найдены")
             return None, None
         
-        # Анализ
-        pain_points = self.find_pain_points(tweets_df)
-        hashtags = self.analyze_hashtags(tweets_df)
-        mentions = self.analyze_mentions(tweets_df)
+        # Копии одного твита (спам, кросспостинг) - один твит с суммарной реакцией
+        tweets_found = len(tweets_df)
+        tweets_df = collapse_near_duplicates(
+            tweets_df,
+            text_columns=('text',),
+            sum_columns=['likes', 'retweets', 'replies', 'engagement'],
+            list_columns=['matched_keywords', 'intents']
+        )
+        
+        # Sentiment твитов (повторные тексты и ретвиты берутся из кэша)
+        self.sentiment_analyzer.add_sentiment(tweets_df)
+        
+        # Хештеги, упоминания, ссылки и кэштеги - одним проходом, со списками в колонках твитов;
+        # домены - по исходным адресам ссылок, а не по t.co из текста
+        entities = add_entities(tweets_df, ('text', 'expanded_urls'))
+        hashtags = entities['hashtags']
+        mentions = entities['mentions']
+        for domain in self.PLATFORM_DOMAINS:
+            entities['domains'].pop(domain, None)
+        
+        # Анализ (большие корпуса - по шардам в пуле процессов)
+        pain_points = ShardedAnalyzer(analysis_workers).run(
+            tweets_df, ['twitter_pain_points']
+        )['twitter_pain_points']
+        corpus_index = InvertedIndex(tweets_df['text'])
+        # Болевые маркеры и их совпадение - те же, что у find_pain_points
+        cooccurrence = CooccurrenceMatrix.from_texts(tweets_df['text'], {
+            'pain': self.PAIN_KEYWORDS,
+            'product': keywords,
+            'competitor': competitor_names or [],
+        })
         
         # Формируем отчет
         report = {
             'platform': 'Twitter/X',
             'analysis_date': datetime.now().isoformat(),
             'total_tweets': len(tweets_df),
+            'near_duplicates_collapsed': tweets_found - len(tweets_df),
             'keywords_searched': keywords,
+            'tweets_by_keyword': tweets_df['matched_keywords'].explode().value_counts().to_dict(),
+            'tweets_by_intent': tweets_df['intents'].explode().value_counts().to_dict(),
             'top_tweets': tweets_df.nlargest(10, 'engagement')[
-                ['text', 'engagement', 'likes', 'retweets', 'url']
+                ['text', 'engagement', 'likes', 'retweets', 'url', 'sentiment']
             ].to_dict('records'),
+            'avg_sentiment': round(float(tweets_df['sentiment'].mean()), 3),
             'pain_points_count': len(pain_points),
             'top_pain_keywords': pain_points['keyword'].value_counts().head(10).to_dict() if len(pain_points) > 0 else {},
             'top_hashtags': dict(hashtags.most_common(20)),
             'top_mentions': dict(mentions.most_common(20)),
+            'top_domains': dict(entities['domains'].most_common(20)),
+            'top_cashtags': dict(entities['cashtags'].most_common(10)),
+            'lexicon_coverage': corpus_index.lexicon_counts(TwitterAdvancedSearch.get_lexicons(competitor_names)),
+            'keyword_cooccurrence': cooccurrence.report(
+                [('pain', 'product'), ('pain', 'competitor'), ('product', 'competitor')]
+            ),
             'engagement_stats': {
                 'avg_likes': float(tweets_df['likes'].mean()),
                 'avg_retweets': float(tweets_df['retweets'].mean()),
                 'avg_replies': float(tweets_df['replies'].mean()),
                 'total_engagement': int(tweets_df['engagement'].sum())
             },
-            'language_distribution': tweets_df['lang'].value_counts().to_dict()
+            'language_distribution': tweets_df['lang'].value_counts().loc[lambda counts: counts > 0].to_dict()
         }
         
         # Сохраняем отчет
@@ -283,6 +814,7 @@ class TwitterSaaSValidator:
         print(f"- Pain points: {len(pain_points)}")
         print(f"- Средний engagement: {report['engagement_stats']['avg_likes']:.1f} likes")
         print(f"- Общий engagement: {report['engagement_stats']['total_engagement']}")
+        print(f"- Средний sentiment: {report['avg_sentiment']:+.2f}")
         
         if hashtags:
             print(f"\n🔥 Топ хештегов:")
@@ -294,22 +826,92 @@ class TwitterSaaSValidator:
             for mention, count in mentions.most_common(10):
                 print(f"  @{mention}: {count}")
         
+        if entities['domains']:
+            print(f"\n🔗 Топ доменов в ссылках:")
+            for domain, count in entities['domains'].most_common(10):
+                print(f"  {domain}: {count}")
+        
         return report, tweets_df
 
 
+register_analyzer(
+    'twitter_pain_points', TwitterSaaSValidator.find_pain_points,
+    columns=['id', 'text', 'engagement', 'created_at', 'url']
+)
+
+
 class TwitterAdvancedSearch:
     """
     Расширенные поисковые запросы для Twitter
     """
     
+    # Лексиконы запросов - по ним же считается покрытие собранного корпуса (InvertedIndex)
+    PAIN_WORDS = ['struggling', 'frustrated', 'annoying', 'hate', 'problem', 'issue']
+    SOLUTION_WORDS = ['how to', 'best way', 'recommend', 'looking for', 'need help', 'advice']
+    PAYMENT_WORDS = ['worth it', 'price', 'expensive', 'cheap', 'paying for', 'subscription']
+    
+    # Шаблоны упакованных запросов: {} - OR группа ключевых слов. Ретвиты не
+    # несут нового текста, а расходуют месячный лимит твитов
+    QUERY_TEMPLATES = {
+        'keywords': '({}) -is:retweet',
+        'pain': '({}) ' + or_group(PAIN_WORDS) + ' -is:retweet',
+        'solution': '({}) ' + or_group(SOLUTION_WORDS) + ' -is:retweet',
+        'willingness_to_pay': '({}) ' + or_group(PAYMENT_WORDS) + ' -is:retweet',
+    }
+    
+    @classmethod
+    def compile_queries(cls, keywords, intents=('keywords',), pack=True, max_length=TWITTER_MAX_QUERY_LENGTH):
+        """
+        Скомпилировать ключевые слова и группы операторов в минимум запросов
+        
+        Args:
+            keywords: ключевые слова идеи
+            intents: группы из QUERY_TEMPLATES
+            pack: упаковывать ключевые слова в OR запросы до max_length
+            max_length: лимит длины запроса
+            
+        Returns:
+            список CompiledQuery(query, keywords, intent)
+        """
+        queries = []
+        
+        for intent in intents:
+            template = cls.QUERY_TEMPLATES[intent]
+            if pack:
+                groups = pack_keywords(keywords, max_length=max_length, template=template)
+                queries.extend(CompiledQuery(group.query, group.keywords, intent) for group in groups)
+            else:
+                queries.extend(
+                    CompiledQuery(template.format(format_operand(keyword)), [keyword], intent)
+                    for keyword in dict.fromkeys(keywords)
+                )
+        
+        return queries
+    
+    @staticmethod
+    def get_lexicons(competitors=None):
+        """
+        Лексиконы для анализа корпуса: pain, solution, willingness_to_pay, competitor
+        
+        Args:
+            competitors: названия конкурентов (лексикон competitor только если заданы)
+        """
+        lexicons = {
+            'pain': TwitterAdvancedSearch.PAIN_WORDS,
+            'solution': TwitterAdvancedSearch.SOLUTION_WORDS,
+            'willingness_to_pay': TwitterAdvancedSearch.PAYMENT_WORDS,
+        }
+        if competitors:
+            lexicons['competitor'] = list(competitors)
+        return lexicons
+    
     @staticmethod
     def build_pain_query(topic):
         """
         Строит запрос для поиска болевых точек
         """
-        pain_words = ['struggling', 'frustrated', 'annoying', 'hate', 'problem', 'issue']
         # Используем OR оператор
-        pain_query = f'{topic} ({" OR ".join(pain_words)})'
+        pain_query = f'{topic} ({" OR ".join(TwitterAdvancedSearch.PAIN_WORDS)})'
         return pain_query
     
     @staticmethod
@@ -317,8 +919,7 @@ class TwitterAdvancedSearch:
         """
         Строит запрос для поиска запросов на решение
         """
-        solution_words = ['how to', 'best way', 'recommend', 'looking for', 'need help', 'advice']
-        solution_query = f'{topic} ({" OR ".join(solution_words)})'
+        solution_query = f'{topic} ({" OR ".join(TwitterAdvancedSearch.SOLUTION_WORDS)})'
         return solution_query
     
     @staticmethod
@@ -336,8 +937,7 @@ class TwitterAdvancedSearch:
         """
         Строит запрос для поиска готовности платить
         """
-        payment_words = ['worth it', 'price', 'expensive', 'cheap', 'paying for', 'subscription']
-        query = f'{topic} ({" OR ".join(payment_words)})'
+        query = f'{topic} ({" OR ".join(TwitterAdvancedSearch.PAYMENT_WORDS)})'
         return query
 
 
@@ -408,9 +1008,11 @@ def main():
     
     thought_leaders = ['naval', 'levelsio', 'paulg', 'patio11']
     
-    for leader in thought_leaders:
+    # Один запрос get_users на все handles (id берутся из кэша), таймлайны - параллельно
+    leaders_tweets = scraper.get_users_tweets(thought_leaders, max_results=50)
+    
+    for leader, user_tweets in leaders_tweets.items():
         print(f"\nАнализ @{leader}...")
-        user_tweets = scraper.get_user_tweets(leader, max_results=50)
         
         if not user_tweets.empty:
             avg_engagement = user_tweets['engagement'].mean()
@@ -246,6 +246,33 @@ def save_results(results, idea):
     
     return filename
 
+def run_ingestion(credentials):
+    """
+    Запускает непрерывное наполнение корпуса Reddit для SaaS subreddits
+    
+    После прогрева validate_saas_idea отвечает по этим subreddits из корпуса
+    """
+    from src.reddit_scraper import RedditSaaSValidator
+    
+    if not credentials.get('REDDIT_CLIENT_ID'):
+        print(f"{Fore.RED}❌ Для ingestion нужны Reddit credentials{Style.RESET_ALL}")
+        sys.exit(1)
+    
+    if not os.getenv('CORPUS_PATH'):
+        print(f"{Fore.RED}❌ Для ingestion задайте CORPUS_PATH в .env{Style.RESET_ALL}")
+        sys.exit(1)
+    
+    reddit = RedditSaaSValidator(
+        client_id=credentials['REDDIT_CLIENT_ID'],
+        client_secret=credentials['REDDIT_CLIENT_SECRET'],
+        user_agent=credentials['REDDIT_USER_AGENT']
+    )
+    
+    print(f"{Fore.CYAN}📡 Ingestion запущен, Ctrl+C для остановки{Style.RESET_ALL}\n")
+    stats = reddit.ingest_submissions()
+    print(f"\n{Fore.GREEN}✓ Записано постов: {stats['posts_ingested']}, "
+          f"обновлено метрик: {stats['posts_refreshed']}{Style.RESET_ALL}")
+
 def main():
     """Главная функция CLI"""
     print_banner()
@@ -301,9 +328,15 @@ def main():
     parser.add_argument('--twitter-only', action='store_true', help='Только Twitter')
     parser.add_argument('--linkedin-only', action='store_true', help='Только LinkedIn')
     parser.add_argument('--output', '-o', help='Файл для сохранения результатов')
+    parser.add_argument('--ingest', action='store_true',
+                        help='Непрерывно наполнять локальный корпус Reddit (нужен CORPUS_PATH)')
     
     args = parser.parse_args()
     
+    if args.ingest:
+        run_ingestion(credentials)
+        return
+    
     # Определяем какие платформы использовать
     if args.reddit_only:
         platforms = ['reddit']